@@ -5,6 +5,7 @@ from typing import Optional
 from app.blockchain.blockchain.block import Block
 from app.blockchain.blockchain.transaction import Transaction
 from app.blockchain.blockchain.wallet import Wallet
+from app.blockchain.signature.rsa import RSASignature
 from app.hashes.hash.sponge_hash import SpongeHash
 from app.utils.file_manager import read_file, write_file
 
@@ -220,14 +221,23 @@ class BlockChain:
 
         return user_currency
 
-    def check_integrity(self, verbose: bool = True) -> bool:
+    def check_integrity(self, verbose: bool = True, workers: int = 1) -> bool:
         """
         Checks the integrity of the blockchain
         :param verbose:
+        :param workers: Number of processes verifying the signatures of the transactions (serial by default, all the
+        cores if None)
         :return:
         """
         integrity = True
 
+        # Verify the signatures of all the transactions at once
+        transactions = [transaction for block in self.__blocks[1:] for transaction in block.transactions]
+        signatures_validity = RSASignature.verify_batch([(transaction.message, transaction.signature,
+                                                          transaction.sender.public_key)
+                                                         for transaction in transactions], workers)
+        signatures_validity = iter(signatures_validity)
+
         # Check genesis block
         if self.__blocks[0].hash().endswith('0' * Block.proof_complexity):
             if verbose:
@@ -266,7 +276,7 @@ class BlockChain:
 
             # Check transactions of the block
             for transaction in self.__blocks[i].transactions:
-                if not transaction.verify():
+                if not next(signatures_validity):
                     integrity = False
                     if verbose:
                         print('La transaction suivante a été altérée :')
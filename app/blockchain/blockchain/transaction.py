@@ -17,11 +17,21 @@ class Transaction:
             self.__signature = self.__sender.execute_transaction(recipient, amount)
 
     def verify(self) -> bool:
-        valid = RSASignature.verify(self.__sender.user + self.__recipient.user + str(self.__amount),
-                                    self.__signature,
-                                    self.__sender.public_key)
+        valid = RSASignature.verify(self.message, self.__signature, self.__sender.public_key)
         return valid
 
+    @property
+    def message(self) -> str:
+        """
+        The signed message of the transaction
+        :return:
+        """
+        return self.__sender.user + self.__recipient.user + str(self.__amount)
+
+    @property
+    def signature(self) -> str:
+        return self.__signature
+
     @property
     def sender(self):
         return self.__sender
@@ -3,7 +3,7 @@ import random
 from app.blockchain.signature.signature import Signature
 from app.hashes.hash.sponge_hash import SpongeHash
 from app.keys_generator.keys_manager.elgamal_keys import ElGamalKeysManager
-from app.utils.modular_arithmetic import square_and_multiply, gcd, inverse
+from app.utils.modular_arithmetic import gcd, inverse, fixed_base, multi_exponentiation
 
 
 class ElGamalSignature(Signature):
@@ -36,7 +36,7 @@ class ElGamalSignature(Signature):
 
         inv_y = inverse(y, self.__k_manager.get_prime() - 1)
 
-        s1 = square_and_multiply(self.__k_manager.get_generator(), y, self.__k_manager.get_prime())
+        s1 = fixed_base(self.__k_manager.get_generator(), self.__k_manager.get_prime()).power(y)
         s2 = (inv_y * (h_digest - self.__k_manager.get_private_key() * s1)) % (self.__k_manager.get_prime() - 1)
 
         return [hex(s1).lstrip('0x'), hex(s2).lstrip('0x')]
@@ -63,9 +63,8 @@ class ElGamalSignature(Signature):
         h = SpongeHash()
         h_digest = h.hash(message, False)
 
-        hs1 = square_and_multiply(public, s1, prime)
-        s1s2 = square_and_multiply(s1, s2, prime)
-        check1 = (hs1 * s1s2) % prime
-        check2 = square_and_multiply(generator, h_digest, prime)
+        # public^s1 * s1^s2 in a single pass
+        check1 = multi_exponentiation([public, s1], [s1, s2], prime)
+        check2 = fixed_base(generator, prime).power(h_digest)
 
         return check1 == check2
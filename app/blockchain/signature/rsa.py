@@ -1,7 +1,27 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 from app.blockchain.signature.signature import Signature
 from app.hashes.hash.sponge_hash import SpongeHash
 from app.keys_generator.keys_manager.rsa_keys import RSAKeysManager
-from app.utils.modular_arithmetic import square_and_multiply
+
+# Under this number of signatures the batch verification is serial (starting the processes would cost more)
+PARALLEL_MIN_SIGNATURES = 64
+
+
+def _verify_group(messages: list, signatures: list, public_key: list) -> list:
+    """
+    Checks the signatures of several messages signed with the same key (run in the worker processes)
+    :param messages: Strings of the messages
+    :param signatures: Signatures of the messages in hexadecimal strings
+    :param public_key: List composed of e and n
+    :return: The validity of every signature
+    """
+    e, n = public_key
+    h = SpongeHash()
+
+    return [h.hash(message, to_hex=False) == pow(int(signature, 16), e, n)
+            for message, signature in zip(messages, signatures)]
 
 
 class RSASignature(Signature):
@@ -17,11 +37,34 @@ class RSASignature(Signature):
         :return: The signature of the message as an hexadecimal string
         """
         h_digest = self.__h.hash(message, to_hex=False)
-        n = self.__k_manager.get_public()[1]  # n is public in RSA
-        signature = square_and_multiply(h_digest, self.__k_manager.get_private_key(), n)
+        crt = self.__k_manager.get_crt_parameters()
+
+        if crt is None:  # Key stored without p and q
+            n = self.__k_manager.get_public()[1]  # n is public in RSA
+            signature = pow(h_digest, self.__k_manager.get_private_key(), n)
+        else:
+            signature = self.sign_crt(h_digest, *crt)
 
         return hex(signature).lstrip('0x')
 
+    @staticmethod
+    def sign_crt(h_digest: int, p: int, q: int, dp: int, dq: int, q_inv: int) -> int:
+        """
+        Computes h_digest^d mod n with the Chinese remainder theorem: two exponentiations modulo p and q with exponents
+        of half the size, recombined with the Garner formula
+        :param h_digest: Hash of the message
+        :param p:
+        :param q:
+        :param dp: d mod (p - 1)
+        :param dq: d mod (q - 1)
+        :param q_inv: Inverse of q mod p
+        :return: The signature as an integer
+        """
+        m_p = pow(h_digest % p, dp, p)
+        m_q = pow(h_digest % q, dq, q)
+
+        return m_q + q * ((q_inv * (m_p - m_q)) % p)
+
     @staticmethod
     def verify(message: str, signature: str, public_key: list) -> bool:
         """
@@ -43,7 +86,40 @@ class RSASignature(Signature):
         e = public_key[0]
         n = public_key[1]
 
-        hash_verify = square_and_multiply(signature, e, n)
+        hash_verify = pow(signature, e, n)
 
         # (H(m))^(e*d) mod n = H(m)
         return h_digest == hash_verify
+
+    @staticmethod
+    def verify_batch(items: list, workers: int = 1) -> list:
+        """
+        Checks many signatures at once: the signatures are grouped by public key and the groups are split into chunks
+        verified in a pool of processes
+        :param items: List of (message, signature, public key) as given to verify
+        :param workers: Number of processes (serial by default, all the cores if None)
+        :return: The validity of every signature, in the order of items
+        """
+        groups = {}
+        for i, (_, _, public_key) in enumerate(items):
+            groups.setdefault(tuple(public_key), []).append(i)
+
+        workers = workers or os.cpu_count() or 1
+        chunk_size = max(1, len(items) // (4 * workers))
+        chunks = [indexes[j:j + chunk_size] for indexes in groups.values() for j in range(0, len(indexes), chunk_size)]
+        chunks_args = ([[items[i][0] for i in chunk] for chunk in chunks],
+                       [[items[i][1] for i in chunk] for chunk in chunks],
+                       [list(items[chunk[0]][2]) for chunk in chunks])
+
+        if workers == 1 or len(items) < PARALLEL_MIN_SIGNATURES:
+            chunks_results = list(map(_verify_group, *chunks_args))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                chunks_results = list(executor.map(_verify_group, *chunks_args))
+
+        results = [False] * len(items)
+        for chunk, chunk_results in zip(chunks, chunks_results):
+            for i, valid in zip(chunk, chunk_results):
+                results[i] = valid
+
+        return results
@@ -33,6 +33,8 @@ def switch_command(cmd):
         10: check_all_cmds,
         11: blockchain.print_blockchain,
         12: blockchain.users_wallets,
+        13: hashes.generate_manifest,
+        14: hashes.check_manifest,
     }
 
     cmd_nb = 0
@@ -62,10 +64,13 @@ def run():
         print('->8<- Débuter / incrémenter la Block-chain.')
         print('->9<- Vérifier l’intégrité de la block-chain.')
         print('->10<- I WANT IT ALL !! I WANT IT NOW !!')
+        print('->13<- Générer le manifeste des hashs d’un dossier.')
+        print('->14<- Vérifier le manifeste des hashs d’un dossier.')
 
         cmd = input()
         if cmd == 'q':
             print(f'Au revoir, ô maître {getpass.getuser()} !')
+            keysgen.stop_prime_pool()
             break
 
         switch_command(cmd)
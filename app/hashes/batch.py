@@ -0,0 +1,171 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from app.hashes.hash.sponge_hash import SpongeHash
+from app.hashes.hash_cache import HashCache
+
+# Manifest of a directory tree: one line per file (tab separated)
+# relative path | size in bytes | modification time in nanoseconds | SpongeHash of the file
+MANIFEST_HEADER = '# path\tsize\tmtime_ns\thash\n'
+
+
+def list_files(root: str, excluded: list = None) -> list:
+    """
+    Lists all the files of a directory tree
+    :param root: The directory
+    :param excluded: Paths of files or directories to ignore (the manifest itself)
+    :return: The paths of the files relative to root (with '/' separators), sorted
+    """
+    excluded = {os.path.abspath(file_path) for file_path in excluded or []}
+    files = []
+    for dir_path, dir_names, filenames in os.walk(root):
+        # The excluded directories are not walked
+        dir_names[:] = [name for name in dir_names if os.path.abspath(os.path.join(dir_path, name)) not in excluded]
+        for filename in filenames:
+            file_path = os.path.join(dir_path, filename)
+            if os.path.isfile(file_path) and os.path.abspath(file_path) not in excluded:
+                files.append(os.path.relpath(file_path, root).replace(os.sep, '/'))
+
+    return sorted(files)
+
+
+def hash_file_entry(file_path: str) -> (int, int, str):
+    """
+    Hashes a file and gives its metadata (run in the worker processes)
+    :param file_path: Path of the file
+    :return: The size, the modification time in nanoseconds and the hash of the file
+    """
+    stat = os.stat(file_path)
+
+    return stat.st_size, stat.st_mtime_ns, SpongeHash().hash_file(file_path)
+
+
+def hash_files(file_paths: list, workers: int = None, cache: HashCache = None) -> list:
+    """
+    Hashes files in a pool of processes
+    :param file_paths: Paths of the files
+    :param workers: Number of processes (all the cores if not given, 1 is serial)
+    :param cache: Hash cache, only the files not in the cache or modified since are hashed
+    :return: The size, modification time and hash of every file, in the order of file_paths
+    """
+    entries = [None] * len(file_paths)
+    stats = [os.stat(file_path) for file_path in file_paths]
+    if cache is not None:
+        for i in range(len(file_paths)):
+            file_hash = cache.get(file_paths[i], stats[i])
+            if file_hash is not None:
+                entries[i] = (stats[i].st_size, stats[i].st_mtime_ns, file_hash)
+
+    to_hash = [i for i in range(len(file_paths)) if entries[i] is None]
+    to_hash_paths = [file_paths[i] for i in to_hash]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(to_hash) < 2:
+        results = [hash_file_entry(file_path) for file_path in to_hash_paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Several files are sent at once to a process to limit the communication overhead
+            results = list(executor.map(hash_file_entry, to_hash_paths,
+                                        chunksize=max(1, len(to_hash) // (4 * workers))))
+
+    for i, entry in zip(to_hash, results):
+        entries[i] = entry
+        # The hash is cached only if the file did not change while it was hashed
+        if cache is not None and entry[:2] == (stats[i].st_size, stats[i].st_mtime_ns):
+            cache.set(file_paths[i], stats[i], entry[2])
+
+    if cache is not None:
+        cache.commit()
+
+    return entries
+
+
+def hash_tree(root: str, workers: int = None, excluded: list = None, cache: HashCache = None) -> list:
+    """
+    Hashes all the files of a directory tree
+    :param root: The directory
+    :param workers: Number of processes (all the cores if not given, 1 is serial)
+    :param excluded: Paths of files or directories to ignore
+    :param cache: Hash cache used to skip the unchanged files (its database is ignored)
+    :return: List of (relative path, size, modification time in nanoseconds, hash)
+    """
+    if cache is not None:
+        excluded = (excluded or []) + cache.files()
+    files = list_files(root, excluded)
+    entries = hash_files([os.path.join(root, file) for file in files], workers, cache)
+
+    return [(file, size, mtime_ns, file_hash) for file, (size, mtime_ns, file_hash) in zip(files, entries)]
+
+
+def write_manifest(manifest_path: str, entries: list):
+    """
+    Writes (or overwrite) a manifest
+    :param manifest_path: Path of the manifest
+    :param entries: List of (relative path, size, modification time in nanoseconds, hash)
+    :return:
+    """
+    with open(manifest_path, 'w', encoding='utf-8') as file:
+        file.write(MANIFEST_HEADER)
+        for file_path, size, mtime_ns, file_hash in entries:
+            file.write(file_path + '\t' + str(size) + '\t' + str(mtime_ns) + '\t' + file_hash + '\n')
+
+
+def read_manifest(manifest_path: str) -> list:
+    """
+    Reads a manifest
+    :param manifest_path: Path of the manifest
+    :return: List of (relative path, size, modification time in nanoseconds, hash)
+    """
+    entries = []
+    with open(manifest_path, 'r', encoding='utf-8') as file:
+        for line in file:
+            if line.startswith('#') or not line.strip():
+                continue
+
+            file_path, size, mtime_ns, file_hash = line.rstrip('\n').rsplit('\t', 3)
+            entries.append((file_path, int(size), int(mtime_ns), file_hash))
+
+    return entries
+
+
+def create_manifest(root: str, manifest_path: str, workers: int = None, cache: HashCache = None,
+                    excluded: list = None) -> list:
+    """
+    Hashes all the files of a directory tree and writes their manifest
+    :param root: The directory
+    :param manifest_path: Path of the manifest (ignored if it is in the directory)
+    :param workers: Number of processes (all the cores if not given, 1 is serial)
+    :param cache: Hash cache used to skip the unchanged files (ignored if its database is in the directory)
+    :param excluded: Paths of other files or directories to ignore
+    :return: The entries of the manifest
+    """
+    entries = hash_tree(root, workers, [manifest_path] + (excluded or []), cache)
+    write_manifest(manifest_path, entries)
+
+    return entries
+
+
+def verify_manifest(root: str, manifest_path: str, workers: int = None, cache: HashCache = None) -> (list, list, list):
+    """
+    Checks the files of a manifest against their hash, the files are hashed again in parallel
+    :param root: The directory of the files
+    :param manifest_path: Path of the manifest
+    :param workers: Number of processes (all the cores if not given, 1 is serial)
+    :param cache: Hash cache, the files whose metadata did not change since they were cached are not hashed again
+    :return: The paths of the valid files, of the modified files and of the missing files
+    """
+    entries = read_manifest(manifest_path)
+    present = [entry for entry in entries if os.path.isfile(os.path.join(root, entry[0]))]
+    missing = [entry[0] for entry in entries if not os.path.isfile(os.path.join(root, entry[0]))]
+
+    results = hash_files([os.path.join(root, entry[0]) for entry in present], workers, cache)
+
+    valid = []
+    modified = []
+    for (file_path, _, _, file_hash), (_, _, current_hash) in zip(present, results):
+        if current_hash == file_hash:
+            valid.append(file_path)
+        else:
+            modified.append(file_path)
+
+    return valid, modified, missing
@@ -1,7 +1,11 @@
+import os
 from os import path
 
+from app.hashes.batch import create_manifest, verify_manifest
 from app.hashes.hash.sponge_hash import SpongeHash
-from app.utils.file_manager import file_loader, write_file, read_file
+from app.hashes.hash_cache import HashCache
+from app.keys_generator.prime_pool import path_pool
+from app.utils.file_manager import file_loader, file_selector, write_file, read_file
 
 path_data = path.join(path.abspath(path.dirname(__file__)), '../../data/')
 
@@ -11,9 +15,11 @@ def generate():
     CLI to generate a hash from a file and store it
     :return:
     """
-    message, filename_message, q_pressed = file_loader("Fichier du dossier data à hasher (test.txt par défaut) :",
-                                                       "test.txt",
-                                                       path_data)
+    message_path, filename_message, q_pressed = file_selector(
+        "Fichier du dossier data à hasher (test.txt par défaut) :",
+        "test.txt",
+        path_data
+    )
     if q_pressed:
         return
 
@@ -26,8 +32,9 @@ def generate():
     if filename_hash == '':
         filename_hash = 'test_hash.txt'
 
+    # The file is hashed by chunks
     h = SpongeHash()
-    result_hash = h.hash(message)
+    result_hash = h.hash_file(message_path)
     print('Hash de ', filename_message, ' :')
     print(result_hash)
 
@@ -39,9 +46,9 @@ def check():
     CLI to check if a file matches to a hash
     :return:
     """
-    message, _, q_pressed = file_loader("Fichier du dossier data à vérifier (test.txt par défaut) :",
-                                        "test.txt",
-                                        path_data)
+    message_path, _, q_pressed = file_selector("Fichier du dossier data à vérifier (test.txt par défaut) :",
+                                               "test.txt",
+                                               path_data)
     if q_pressed:
         return
 
@@ -51,11 +58,83 @@ def check():
     if q_pressed:
         return
 
-    h = SpongeHash()
-    if h.hash(message) == hash_value:
-        print('Le hash correspond au message!')
-    else:
-        print('Le hash ne correspond pas au message!')
+    # The file is hashed again only if it changed since its last check
+    with HashCache() as cache:
+        if cache.hash_file(message_path) == hash_value.strip():
+            print('Le hash correspond au message!')
+        else:
+            print('Le hash ne correspond pas au message!')
+
+        print(cache.statistics())
+
+
+def generate_manifest():
+    """
+    CLI to hash all the files of a directory and store their hashes in a manifest
+    :return:
+    """
+    root, manifest_path, q_pressed = _get_manifest_paths()
+    if q_pressed:
+        return
+
+    with HashCache() as cache:
+        # The reserve of primes changes each time a prime is taken from it
+        entries = create_manifest(root, manifest_path, workers=os.cpu_count() or 1, cache=cache, excluded=[path_pool])
+        print(len(entries), ' fichiers hashés, manifeste écrit dans ', manifest_path)
+        print(cache.statistics())
+
+
+def check_manifest():
+    """
+    CLI to check all the files of a manifest
+    :return:
+    """
+    root, manifest_path, q_pressed = _get_manifest_paths()
+    if q_pressed:
+        return
+
+    if not path.isfile(manifest_path):
+        print('Erreur dans la lecture du manifeste')
+        return
+
+    with HashCache() as cache:
+        valid, modified, missing = verify_manifest(root, manifest_path, workers=os.cpu_count() or 1, cache=cache)
+        print(cache.statistics())
+
+    for file_path in modified:
+        print('Le hash ne correspond pas au fichier ', file_path)
+    for file_path in missing:
+        print('Fichier manquant : ', file_path)
+
+    print(len(valid), ' fichiers valides, ', len(modified), ' modifiés, ', len(missing), ' manquants')
+
+
+def _get_manifest_paths() -> (str, str, bool):
+    """
+    Get the directory to hash and the manifest path from the user input
+    :return: The directory, the manifest path and a boolean to quit
+    """
+    print("Dossier à hasher (dossier data par défaut) :")
+    root = input()
+    if root == 'q':
+        return '', '', True
+
+    if root == '':
+        root = path_data
+
+    if not path.isdir(root):
+        print("Ce dossier n'existe pas")
+        return '', '', True
+
+    print("Fichier du dossier data pour le manifeste (manifest.txt par défaut) :")
+    filename_manifest = input()
+    if filename_manifest == 'q':
+        return '', '', True
+
+    if filename_manifest == '':
+        filename_manifest = 'manifest.txt'
+
+    return root, path.join(path_data, filename_manifest), False
 
 
 def all():
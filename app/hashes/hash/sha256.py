@@ -1,3 +1,6 @@
+import struct
+from typing import Union
+
 from app.hashes.hash.hash import Hash
 from app.utils.bit_operation import right_circ_shift, add_mod
 
@@ -10,6 +13,7 @@ class SHA256(Hash):
     __block_size = 64  # SHA-256 block size in bytes (64 bytes = 512 bits)
     __message_count_size = 64  # Size of the allocated part for message size in bits
     __message_schedule_size = 64  # Size of the message schedule array
+    __block_struct = struct.Struct('>16I')  # A block as 16 big endian 32-bit words
 
     # SHA-256 constants
     __k = [
@@ -27,8 +31,15 @@ class SHA256(Hash):
         0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19,
     ]
 
-    def __init__(self, verbose: bool = False):
+    def __init__(self, verbose: bool = False, data: Union[bytes, bytearray, memoryview, str] = None,
+                 reference: bool = False):
+        """
+        :param verbose: Prints the details of the hash computation (hash method only)
+        :param data: First data given to update
+        :param reference: Uses the readable compression function instead of the fast one (always used when verbose)
+        """
         self.__verbose = verbose
+        self.__reference = reference or verbose
         self.__message = None
         self.__payload = None
         self.__h = []
@@ -36,6 +47,94 @@ class SHA256(Hash):
         self.__message_schedule = []
         self.__pad_message = None
 
+        # State of the incremental hash (update, digest)
+        self.__state = list(self.__initial_h)  # Intermediate hash value
+        self.__buffer = bytearray()  # Bytes waiting for a complete block
+        self.__length = 0  # Number of bytes given to update
+
+        if data is not None:
+            self.update(data)
+
+    def update(self, data: Union[bytes, bytearray, memoryview, str]):
+        """
+        Adds data to the message to hash, every complete 512-bit block is compressed right away
+        :param data: Bytes (any object supporting the buffer protocol) or string encoded in UTF-8
+        :return: The hash object
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+
+        data = memoryview(data).cast('B')
+        self.__length += len(data)
+        if self.__length * 8 >= (1 << self.__message_count_size):
+            raise Exception('Message size must be lower than 2^', self.__message_count_size, ' bits')
+
+        if self.__buffer:  # Completes the pending block first
+            nb_missing = self.__block_size - len(self.__buffer)
+            self.__buffer += data[:nb_missing]
+            data = data[nb_missing:]
+            if len(self.__buffer) < self.__block_size:
+                return self
+
+            self.__state = self.__compress(self.__state, self.__block_struct.unpack(self.__buffer))
+            self.__buffer.clear()
+
+        nb_full_bytes = len(data) - len(data) % self.__block_size
+        compress = self.__compress
+        unpack_from = self.__block_struct.unpack_from
+        state = self.__state
+        for offset in range(0, nb_full_bytes, self.__block_size):
+            state = compress(state, unpack_from(data, offset))
+        self.__state = state
+
+        self.__buffer += data[nb_full_bytes:]
+
+        return self
+
+    @staticmethod
+    def compress(block_words: Union[list, tuple], h: Union[list, tuple] = None) -> list:
+        """
+        Compresses one 512-bit block with the fast compression function
+        :param block_words: The 16 32-bit words of the block
+        :param h: The 8 32-bit words of the intermediate hash value (initial hash value if not given)
+        :return: The next intermediate hash value
+        """
+        return SHA256.__compress_fast(SHA256.__initial_h if h is None else h, block_words)
+
+    def digest(self) -> bytes:
+        """
+        Gives the hash of the data given to update so far (more data can still be added)
+        :return: The 32-byte hash
+        """
+        # Section 5.1: Padding with 1 bit, zeros and the message bit length on 64 bits
+        nb_padding_zeros = (self.__block_size - 1 - 8 - len(self.__buffer)) % self.__block_size
+        last_blocks = bytes(self.__buffer) + b'\x80' + bytes(nb_padding_zeros) + struct.pack('>Q', self.__length * 8)
+
+        state = self.__state
+        for offset in range(0, len(last_blocks), self.__block_size):
+            state = self.__compress(state, self.__block_struct.unpack_from(last_blocks, offset))
+
+        return struct.pack('>8I', *state)
+
+    def hexdigest(self) -> str:
+        """
+        Gives the hash of the data given to update so far as an hexadecimal string (with its leading zeros)
+        :return:
+        """
+        return self.digest().hex()
+
+    def copy(self):
+        """
+        Copies the hash object, to hash several messages sharing a common beginning
+        :return: A new hash object in the same state
+        """
+        other = SHA256(self.__verbose, reference=self.__reference)
+        other.__state = list(self.__state)
+        other.__buffer = bytearray(self.__buffer)
+        other.__length = self.__length
+
+        return other
+
     def hash(self, message, to_hex: bool = True, pad_message: bool = True):
         """
         Calculates the SHA-256 of the given message
@@ -44,6 +143,13 @@ class SHA256(Hash):
         :param pad_message: Pad the message with its size if true
         :return: String or integer format of the hash
         """
+        if isinstance(message, (bytes, bytearray, memoryview)) or \
+                (isinstance(message, str) and pad_message and not self.__verbose):
+            # Strings and bytes are hashed incrementally, block by block
+            raw_hash = int.from_bytes(SHA256(data=message, reference=self.__reference).digest(), 'big')
+
+            return hex(raw_hash).lstrip('0x') if to_hex else raw_hash
+
         self.__pad_message = pad_message
         self.__payload = None
         self.__message_blocks = []
@@ -152,41 +258,12 @@ class SHA256(Hash):
         :return:
         """
 
-        mask = (1 << 32) - 1
-
         # Compression of the message
         for i in range(len(self.__message_blocks)):
             curr_message_block = self.__message_blocks[i]
 
-            # Prepare the message schedule
-            self.__prepare_message_schedule(curr_message_block)
-
-            # Initialize the 8 working variables
-            a, b, c, d, e, f, g, h = self.__h[i]
-
-            for t in range(64):
-                t1 = h + self.__sigma_maj1(e) + self.__ch(e, f, g) + self.__k[t] + self.__message_schedule[t]
-                t2 = self.__sigma_maj0(a) + self.__maj(a, b, c)
-                h = g
-                g = f
-                f = e
-                e = (d + t1) & mask
-                d = c
-                c = b
-                b = a
-                a = (t1 + t2) & mask
-
             # Compute the intermediate hash value
-            self.__h.append([
-                (a + self.__h[i][0]) & mask,
-                (b + self.__h[i][1]) & mask,
-                (c + self.__h[i][2]) & mask,
-                (d + self.__h[i][3]) & mask,
-                (e + self.__h[i][4]) & mask,
-                (f + self.__h[i][5]) & mask,
-                (g + self.__h[i][6]) & mask,
-                (h + self.__h[i][7]) & mask,
-            ])
+            self.__h.append(self.__compress(self.__h[i], self.__split_block(curr_message_block)))
 
         final_hash = 0
 
@@ -195,17 +272,114 @@ class SHA256(Hash):
 
         return final_hash
 
-    def __prepare_message_schedule(self, curr_message_block: int):
+    def __compress(self, h: list, block_words: Union[list, tuple]) -> list:
+        """
+        Section 6.2.2: Compression of one block
+        :param h: The 8 32-bit words of the intermediate hash value
+        :param block_words: The 16 32-bit words of the block
+        :return: The next intermediate hash value
+        """
+        if self.__reference:
+            return self.__compress_reference(h, block_words)
+
+        return self.__compress_fast(h, block_words)
+
+    @staticmethod
+    def __compress_fast(h: list, block_words: Union[list, tuple], k: list = __k) -> list:
+        """
+        Same as __compress_reference with the functions of section 4.1.2 inlined: the rotations are done without
+        masking the shifted values, the 32-bit mask is applied once on the result. The constants are local variables
+        :param h: The 8 32-bit words of the intermediate hash value
+        :param block_words: The 16 32-bit words of the block
+        :param k: SHA-256 constants (bound as a local variable)
+        :return: The next intermediate hash value
+        """
+
+        # Message schedule: W[t] = σ1(W[t - 2]) + W[t - 7] + σ0(W[t - 15]) + W[t - 16]
+        w = list(block_words)
+        append = w.append
+        for t in range(16, 64):
+            x = w[t - 15]
+            y = w[t - 2]
+            append((w[t - 16] + w[t - 7]
+                    + (((x >> 7 | x << 25) ^ (x >> 18 | x << 14) ^ (x >> 3)) & 0xffffffff)
+                    + (((y >> 17 | y << 15) ^ (y >> 19 | y << 13) ^ (y >> 10)) & 0xffffffff)) & 0xffffffff)
+
+        a, b, c, d, e, f, g, h_var = h
+
+        for t in range(64):
+            # h + ∑1(e) + Ch(e, f, g) + K[t] + W[t]
+            t1 = (h_var + (((e >> 6 | e << 26) ^ (e >> 11 | e << 21) ^ (e >> 25 | e << 7)) & 0xffffffff)
+                  + (g ^ (e & (f ^ g))) + k[t] + w[t])
+            # ∑0(a) + Maj(a, b, c)
+            t2 = ((((a >> 2 | a << 30) ^ (a >> 13 | a << 19) ^ (a >> 22 | a << 10)) & 0xffffffff)
+                  + ((a & b) | (c & (a | b))))
+            h_var = g
+            g = f
+            f = e
+            e = (d + t1) & 0xffffffff
+            d = c
+            c = b
+            b = a
+            a = (t1 + t2) & 0xffffffff
+
+        return [
+            (a + h[0]) & 0xffffffff,
+            (b + h[1]) & 0xffffffff,
+            (c + h[2]) & 0xffffffff,
+            (d + h[3]) & 0xffffffff,
+            (e + h[4]) & 0xffffffff,
+            (f + h[5]) & 0xffffffff,
+            (g + h[6]) & 0xffffffff,
+            (h_var + h[7]) & 0xffffffff,
+        ]
+
+    def __compress_reference(self, h: list, block_words: Union[list, tuple]) -> list:
+        """
+        Section 6.2.2: Compression of one block, readable version following the specification
+        :param h: The 8 32-bit words of the intermediate hash value
+        :param block_words: The 16 32-bit words of the block
+        :return: The next intermediate hash value
+        """
+        mask = (1 << 32) - 1
+
+        # Prepare the message schedule
+        self.__prepare_message_schedule(block_words)
+
+        # Initialize the 8 working variables
+        a, b, c, d, e, f, g, h_var = h
+
+        for t in range(64):
+            t1 = h_var + self.__sigma_maj1(e) + self.__ch(e, f, g) + self.__k[t] + self.__message_schedule[t]
+            t2 = self.__sigma_maj0(a) + self.__maj(a, b, c)
+            h_var = g
+            g = f
+            f = e
+            e = (d + t1) & mask
+            d = c
+            c = b
+            b = a
+            a = (t1 + t2) & mask
+
+        return [
+            (a + h[0]) & mask,
+            (b + h[1]) & mask,
+            (c + h[2]) & mask,
+            (d + h[3]) & mask,
+            (e + h[4]) & mask,
+            (f + h[5]) & mask,
+            (g + h[6]) & mask,
+            (h_var + h[7]) & mask,
+        ]
+
+    def __prepare_message_schedule(self, block_words: Union[list, tuple]):
         """
         Prepare the message schedule of the block to hash
-        :param curr_message_block:
+        :param block_words: The block split in 16*32 bits
         :return:
         """
-        # Split the 512-bit block in 16*32
-        block_parts = self.__split_block(curr_message_block)
-
         # The first 16 words of the message schedule are the block in 32-bits
-        self.__message_schedule = block_parts
+        self.__message_schedule = list(block_words)
 
         # The message schedule is expanded to 64 words using the previous values
         for t in range(16, self.__message_schedule_size):
@@ -1,3 +1,7 @@
+import mmap
+import struct
+from typing import Union
+
 from app.hashes.hash.hash import Hash
 from app.hashes.hash.sha256 import SHA256
 
@@ -5,108 +9,162 @@ from app.hashes.hash.sha256 import SHA256
 class SpongeHash(Hash):
     __message_part_size = 256  # Size of of the messages parts in bits (chosen arbitrarily)
     __message_count_size = 64  # Size of the allocated part for message payload size in bits (chosen arbitrarily)
+    __part_struct = struct.Struct('>8I')  # A message part as 8 big endian 32-bit words
+    __capacity_words = (0,) * 8  # Words of the state not touched by the message parts
+
+    def __init__(self, data: Union[str, bytes, bytearray, memoryview] = None):
+        """
+        :param data: First data given to update
+        """
+        # State of the incremental hash (update, digest)
+        self.__state = self.__capacity_words  # The state as 8 32-bit words
+        self.__buffer = bytearray()  # Bytes waiting for a complete message part
+        self.__length = 0  # Number of bytes given to update
+
+        if data is not None:
+            self.update(data)
 
-    def hash(self, message: str, to_hex: bool = True):
+    def hash(self, message: Union[str, bytes, bytearray, memoryview], to_hex: bool = True):
         """
         Calculate the hash of the message with SHA-256 encapsulated in a sponge function
-        :param message:
+        :param message: String (encoded in UTF-8) or bytes (any object supporting the buffer protocol)
         :param to_hex: If true, returns an hexadecimal string of the hash else an integer
         :return: String or integer format of the hash
         """
-        message_parts = self.__split_message(message)
-        state = self.__absorb(message_parts)
-        hash_parts = self.__squeeze(state)
-        raw_hash = self.__merge_hash(hash_parts)
+        sponge = SpongeHash(message)
 
-        if to_hex:
-            return hex(raw_hash).lstrip('0x')
+        return sponge.hexdigest() if to_hex else int.from_bytes(sponge.digest(), 'big')
 
-        return raw_hash
-
-    def __absorb(self, message_parts: list) -> int:
+    def hash_file(self, file_path: str, to_hex: bool = True, chunk_size: int = 1 << 20, use_mmap: bool = False):
+        """
+        Calculate the hash of the content of a file, read by chunks so that the memory used does not depend on its size
+        :param file_path: Path of the file
+        :param to_hex: If true, returns an hexadecimal string of the hash else an integer
+        :param chunk_size: Number of bytes read at once
+        :param use_mmap: Maps the file in memory instead of reading it
+        :return: String or integer format of the hash (same as hash with the content of the file)
         """
-        Absorb the message parts and gives the final state
-        :param message_parts:
-        :return: The final state of the absorb phase
+        sponge = SpongeHash()
+        with open(file_path, 'rb') as file:
+            if use_mmap and file.seek(0, 2) != 0:  # An empty file can not be mapped
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    sponge.update(mapped)
+            else:
+                file.seek(0)
+                for chunk in iter(lambda: file.read(chunk_size), b''):
+                    sponge.update(chunk)
+
+        return sponge.hexdigest() if to_hex else int.from_bytes(sponge.digest(), 'big')
+
+    def update(self, data: Union[str, bytes, bytearray, memoryview]):
         """
+        Absorbs data, every complete message part is absorbed right away
+        :param data: String (encoded in UTF-8) or bytes (any object supporting the buffer protocol)
+        :return: The hash object
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
 
-        # State is composed of the bitrate and capacity parts
-        # |         State       |
-        # | capacity  | bitrate |
+        data = memoryview(data).cast('B')
+        part_size = self.__message_part_size // 8
+        self.__length += len(data)
 
-        state = 0
-        f_hash = SHA256()
+        if self.__buffer:  # Completes the pending part first
+            nb_missing = part_size - len(self.__buffer)
+            self.__buffer += data[:nb_missing]
+            data = data[nb_missing:]
+            if len(self.__buffer) < part_size:
+                return self
 
-        for msg_part in message_parts:
-            state ^= msg_part
-            state = f_hash.hash(state, to_hex=False, pad_message=False)
+            self.__state = self.__absorb(self.__state, self.__buffer)
+            self.__buffer.clear()
 
-        if len(message_parts) < 2:  # Following the constraint to apply the function at least twice
-            state = f_hash.hash(state, to_hex=False, pad_message=False)
+        nb_full_bytes = len(data) - len(data) % part_size
+        self.__state = self.__absorb(self.__state, data[:nb_full_bytes])
+        self.__buffer += data[nb_full_bytes:]
 
-        return state
+        return self
 
-    def __squeeze(self, state: int) -> list:
+    def digest(self) -> bytes:
         """
-        Extract the final hash from the squeezed states
-        :param state: The last state of the absorb process
-        :return: The final hash as a list
+        Gives the hash of the data given to update so far (more data can still be added)
+        :return: The 64-byte hash
         """
-        bitrate_mask = (1 << self.__message_part_size) - 1
-        hash_parts = []
-        f_hash = SHA256()
-        for i in range(f_hash.get_block_size() // self.__message_part_size):
-            hash_parts.insert(0, state & bitrate_mask)
-            state = f_hash.hash(state, to_hex=False, pad_message=False)
+        last_parts = self.__padding(self.__buffer, self.__length)
+        state = self.__absorb(self.__state, last_parts)
 
-        return hash_parts
+        # Following the constraint to apply the function at least twice
+        if (self.__length + len(last_parts) - len(self.__buffer)) // (self.__message_part_size // 8) < 2:
+            state = self.__f(state)
 
-    def __split_message(self, message: str) -> list:
+        return self.__squeeze(state)
+
+    def hexdigest(self) -> str:
         """
-        Splits the message into a list of integers to be processed by the absorption phase
-        :param message: Given message as a string
-        :return: The list of integers representing the message
+        Gives the hash of the data given to update so far as an hexadecimal string, in the format of hash
+        (without its leading zeros)
+        :return:
         """
-        # String to integer
-        message_bytes = bytearray(message, 'utf-8')  # String to byte array
-
-        message_length = len(message_bytes) * 8
+        return hex(int.from_bytes(self.digest(), 'big')).lstrip('0x')
 
-        if message_length >= (1 << self.__message_count_size):
-            raise Exception('Message size must be lower than 2^', self.__message_count_size, ' bits')
-
-        message_int = message_bytes[0]
-        for i in range(1, len(message_bytes)):
-            message_int = (message_int << 8) | message_bytes[i]
-
-        # Padding
+    @staticmethod
+    def __f(state: tuple) -> tuple:
+        """
+        Function of the sponge: SHA-256 compression of the 512-bit block made of zeros and the 256-bit state
+        :param state: The state as 8 32-bit words
+        :return: The next state
+        """
+        return tuple(SHA256.compress(SpongeHash.__capacity_words + state))
 
-        nb_blocks = (message_length // self.__message_part_size) + 1
-        remaining_bits = message_length % self.__message_part_size
-        if remaining_bits + 1 + self.__message_count_size <= self.__message_part_size:  # Enough space in the last block
-            nb_padding_zeros = self.__message_part_size - remaining_bits - 1 - self.__message_count_size
-        else:  # Not enough place in the last block so we will create one more
-            nb_padding_zeros = (2 * self.__message_part_size) - remaining_bits - 1 - self.__message_count_size
-            nb_blocks += 1
+    def __absorb(self, state: tuple, message_parts: Union[bytes, memoryview]) -> tuple:
+        """
+        Absorb the message parts and gives the next state
+        :param state: The state as 8 32-bit words
+        :param message_parts: The message parts as bytes (a multiple of the part size)
+        :return: The state after the absorption of the message parts
+        """
 
-        message_int = (message_int << 1) | 1  # End of message separator
-        message_int = message_int << nb_padding_zeros  # Padding of the message to fit the blocks size
-        message_int = (message_int << self.__message_count_size) | message_length  # Message bit length at the end
+        # State is composed of the bitrate and capacity parts
+        # |         State       |
+        # | capacity  | bitrate |
 
-        # Parsing
-        mask_block = (1 << self.__message_part_size) - 1
+        unpack_from = self.__part_struct.unpack_from
+        f = self.__f
+        for offset in range(0, len(message_parts), self.__message_part_size // 8):
+            part = unpack_from(message_parts, offset)
+            state = f((state[0] ^ part[0], state[1] ^ part[1], state[2] ^ part[2], state[3] ^ part[3],
+                       state[4] ^ part[4], state[5] ^ part[5], state[6] ^ part[6], state[7] ^ part[7]))
 
-        message_payload = []
-        for i in range(nb_blocks):
-            message_payload.append((message_int >> ((nb_blocks - i - 1) * self.__message_part_size)) & mask_block)
+        return state
 
-        return message_payload
+    def __squeeze(self, state: tuple) -> bytes:
+        """
+        Extract the final hash from the squeezed states
+        :param state: The last state of the absorb process
+        :return: The final hash
+        """
+        # The hash is made of the bitrate of the successive states, the last one on the left
+        hash_words = list(state)
+        for _ in range(SHA256().get_block_size() // self.__message_part_size - 1):
+            state = self.__f(state)
+            hash_words = list(state) + hash_words
 
-    def __merge_hash(self, hash_parts):
+        return struct.pack('>' + str(len(hash_words)) + 'I', *hash_words)
 
-        final_hash = 0
+    def __padding(self, last_bytes: Union[bytes, memoryview], message_length: int) -> bytes:
+        """
+        Pads the end of the message: 1 bit, zeros and the message bit length, to fill the last parts
+        :param last_bytes: The bytes of the message after its last complete part
+        :param message_length: Length of the message in bytes
+        :return: The last parts of the message
+        """
+        message_length *= 8
+        if message_length >= (1 << self.__message_count_size):
+            raise Exception('Message size must be lower than 2^', self.__message_count_size, ' bits')
 
-        for i in range(len(hash_parts)):
-            final_hash = (final_hash << self.__message_part_size) | hash_parts[i]
+        part_size = self.__message_part_size // 8
+        count_size = self.__message_count_size // 8
+        # The end of message separator is the byte 0x80 (1 bit followed by 7 zeros)
+        nb_padding_zeros = (part_size - 1 - count_size - len(last_bytes)) % part_size
 
-        return final_hash
+        return bytes(last_bytes) + b'\x80' + bytes(nb_padding_zeros) + message_length.to_bytes(count_size, 'big')
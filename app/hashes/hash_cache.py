@@ -0,0 +1,104 @@
+import os
+import sqlite3
+
+from app.hashes.hash.sponge_hash import SpongeHash
+
+path_data = os.path.join(os.path.abspath(os.path.dirname(__file__)), '../../data/')
+
+
+class HashCache:
+    """
+    Persistent cache of the SpongeHash of files, a file is hashed again only if its metadata (inode, size and
+    modification time) changed since its hash was stored
+    """
+
+    def __init__(self, db_path: str = os.path.join(path_data, 'hash_cache.sqlite')):
+        """
+        :param db_path: Path of the SQLite database (created if it does not exist)
+        """
+        self.db_path = db_path
+        self.__connection = sqlite3.connect(db_path)
+        self.__connection.execute('CREATE TABLE IF NOT EXISTS files ('
+                                  'path TEXT PRIMARY KEY, inode INTEGER, size INTEGER, mtime_ns INTEGER, hash TEXT)')
+        self.hits = 0  # Number of hashes found in the cache
+        self.misses = 0  # Number of files hashed because their hash was not in the cache or outdated
+
+    def files(self) -> list:
+        """
+        Gives the files written by the cache (the database and its journals), which change at every run
+        :return:
+        """
+        return [self.db_path, self.db_path + '-journal', self.db_path + '-wal', self.db_path + '-shm']
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def commit(self):
+        """
+        Saves the hashes stored so far
+        :return:
+        """
+        self.__connection.commit()
+
+    def close(self):
+        """
+        Saves the cache and closes the database
+        :return:
+        """
+        self.commit()
+        self.__connection.close()
+
+    def get(self, file_path: str, stat: os.stat_result = None):
+        """
+        Gives the cached hash of a file if its metadata did not change
+        :param file_path: Path of the file
+        :param stat: Current metadata of the file (read if not given)
+        :return: The hash or None
+        """
+        stat = stat or os.stat(file_path)
+        row = self.__connection.execute('SELECT inode, size, mtime_ns, hash FROM files WHERE path = ?',
+                                        (os.path.abspath(file_path),)).fetchone()
+
+        if row is not None and row[:3] == (stat.st_ino, stat.st_size, stat.st_mtime_ns):
+            self.hits += 1
+            return row[3]
+
+        self.misses += 1
+        return None
+
+    def set(self, file_path: str, stat: os.stat_result, file_hash: str):
+        """
+        Stores the hash of a file
+        :param file_path: Path of the file
+        :param stat: Metadata of the file when it was hashed
+        :param file_hash: The hash
+        :return:
+        """
+        self.__connection.execute('INSERT OR REPLACE INTO files (path, inode, size, mtime_ns, hash) '
+                                  'VALUES (?, ?, ?, ?, ?)',
+                                  (os.path.abspath(file_path), stat.st_ino, stat.st_size, stat.st_mtime_ns, file_hash))
+
+    def hash_file(self, file_path: str) -> str:
+        """
+        Gives the hash of a file, from the cache if the file did not change
+        :param file_path: Path of the file
+        :return: The hash (same as SpongeHash.hash_file)
+        """
+        stat = os.stat(file_path)
+        file_hash = self.get(file_path, stat)
+        if file_hash is None:
+            file_hash = SpongeHash().hash_file(file_path)
+            self.set(file_path, stat, file_hash)
+            self.commit()
+
+        return file_hash
+
+    def statistics(self) -> str:
+        """
+        Gives the statistics of the cache for the current run
+        :return:
+        """
+        return 'Cache des hashs : ' + str(self.hits) + ' fichiers inchangés, ' + str(self.misses) + ' fichiers hachés'
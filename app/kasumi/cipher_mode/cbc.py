@@ -1,48 +1,52 @@
+from app.kasumi import parallel
 from app.kasumi.cipher_mode.cipher_mode import CipherMode
-from app.kasumi.kasumi import Kasumi
+from app.kasumi.kasumi import Kasumi, KasumiKey
 
 
 class CBC(CipherMode):
 
-    def __init__(self, kasumi: Kasumi):
-        super().__init__(kasumi)
+    def __init__(self, kasumi: Kasumi, workers: int = 1, chunk_size: int = 4096):
+        super().__init__(kasumi, workers, chunk_size)
 
-    def encrypt(self, message: str, key: str, iv: str) -> str:
+    def _encrypt_blocks(self, blocks: list, key: KasumiKey, state) -> (list, object):
         """
-        Encrypts message with key using CBC mode
-        :param message:
-        :param key:
-        :param iv:
-        :return:
+        Encrypts message blocks with key using CBC mode
+        :param blocks: 64-bit message blocks
+        :param key: Expanded key
+        :param state: Previous encrypted block (the IV for the first block)
+        :return: The encrypted blocks and the next state
         """
 
-        kasumi_blocks = super()._string_to_blocks(message)
-        key = int(key, 16)
-        prev_block = int(iv, 16)
+        prev_block = state
 
         # CBC
-        for i in range(len(kasumi_blocks)):
-            kasumi_blocks[i] = prev_block = self.kasumi.encrypt(kasumi_blocks[i] ^ prev_block, key)
+        for i in range(len(blocks)):
+            blocks[i] = prev_block = self.kasumi.encrypt(blocks[i] ^ prev_block, key)
 
-        return super()._blocks_to_string(kasumi_blocks, True)
+        return blocks, prev_block
 
-    def decrypt(self, message: str, key: str, iv: str) -> str:
+    def _decrypt_blocks(self, blocks: list, key: KasumiKey, state) -> (list, object):
         """
-        Decrypts message with key using CBC mode
-        :param message:
-        :param key:
-        :param iv:
-        :return:
+        Decrypts encrypted blocks with key using CBC mode
+        :param blocks: 64-bit encrypted blocks
+        :param key: Expanded key
+        :param state: Previous encrypted block (the IV for the first block)
+        :return: The decrypted blocks and the next state
         """
 
-        kasumi_blocks = super()._string_to_blocks(message, True)
-        key = int(key, 16)
-        prev_block = int(iv, 16)
+        prev_block = state
 
-        # CBC
-        for i in range(len(kasumi_blocks)):
-            curr_block = kasumi_blocks[i]
-            kasumi_blocks[i] = self.kasumi.decrypt(curr_block, key) ^ prev_block
+        if self._is_parallel(len(blocks)):  # Each block only depends on itself and the previous encrypted block
+            # The first block of each chunk is chained with the last encrypted block of the previous chunk
+            prev_blocks = [prev_block] + blocks[self.chunk_size - 1::self.chunk_size]
+            last_block = blocks[-1]
+            return self._run_parallel(parallel.cbc_decrypt_chunk, key, blocks, prev_blocks), last_block
+
+        # CBC (the blocks are decrypted all at once and then xored with the previous encrypted block)
+        decrypted_blocks = self.kasumi.decrypt_blocks(blocks, key)
+        for i in range(len(blocks)):
+            curr_block = blocks[i]
+            blocks[i] = decrypted_blocks[i] ^ prev_block
             prev_block = curr_block
 
-        return super()._blocks_to_string(kasumi_blocks)
+        return blocks, prev_block
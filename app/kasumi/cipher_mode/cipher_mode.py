@@ -1,12 +1,25 @@
 import abc
-from app.kasumi.kasumi import Kasumi
-from app.utils.bit_operation import split_bytes, merge_bytes
+import struct
+from typing import Union
+from app.kasumi import parallel
+from app.kasumi.kasumi import Kasumi, KasumiKey
 
 
 class CipherMode(abc.ABC):
 
-    def __init__(self, kasumi: Kasumi):
+    _trailer_size = 0  # Number of blocks appended at the end of the encrypted message by the mode (GCM tag)
+
+    def __init__(self, kasumi: Kasumi, workers: int = 1, chunk_size: int = 4096):
+        """
+        :param kasumi:
+        :param workers: Number of processes used by the modes able to process blocks in parallel (1 is serial)
+        :param chunk_size: Number of blocks sent at once to a process
+        """
         self.kasumi = kasumi
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.__executor = None  # Pool of processes of the current operation, started by the first parallel chunks
+        self.__executor_key = None
 
     @classmethod
     def __subclasshook__(cls, subclass):
@@ -16,53 +29,336 @@ class CipherMode(abc.ABC):
                 callable(subclass.decrypt) or
                 NotImplemented)
 
+    @staticmethod
+    def _bytes_to_blocks(message: Union[bytes, bytearray, memoryview]) -> list:
+        """
+        Converts bytes into a list of 64-bit blocks, the last block is padded with zeros
+        :param message: The bytes (any object supporting the buffer protocol)
+        :return:
+        """
+        message_view = memoryview(message).cast('B')
+        nb_full_blocks = len(message_view) // 8
+
+        # Unpack all the complete blocks at once without copying the message
+        kasumi_blocks = list(struct.unpack('>' + str(nb_full_blocks) + 'Q', message_view[:nb_full_blocks * 8]))
+
+        remaining_bytes = message_view[nb_full_blocks * 8:]
+        if len(remaining_bytes) != 0:  # Make one last block for the remaining bytes
+            kasumi_blocks.append(int.from_bytes(remaining_bytes, 'big') << (8 * (8 - len(remaining_bytes))))
+
+        return kasumi_blocks
+
+    @staticmethod
+    def _blocks_to_bytes(blocks: list) -> bytes:
+        """
+        Converts a 64-bit block list to bytes
+        :param blocks: The block list
+        :return:
+        """
+        return struct.pack('>' + str(len(blocks)) + 'Q', *blocks)
+
     @staticmethod
     def _string_to_blocks(message: str, is_hex: bool = False) -> list:
         """
-        Converts a string into a list of 128-bit blocks
+        Converts a string into a list of 64-bit blocks
         :param message: The string
         :param is_hex: If the message is an hex string
         :return:
         """
-        message_bytes = None
         if is_hex:
-            message_bytes = bytearray.fromhex(message)
+            message_bytes = bytes.fromhex(message)
         else:
-            message_bytes = bytearray(message, 'utf-8')
-
-        kasumi_blocks = []
-        block_list = []
-        for curr_byte in message_bytes:
-            if len(block_list) == 8:  # 64 bits
-                kasumi_blocks.append(merge_bytes(block_list))  # Creates 64 bits message blocks
-                block_list = []
-            block_list.append(curr_byte)
+            message_bytes = message.encode('utf-8')
 
-        if len(block_list) != 0:  # Make one last block for the remaining bytes
-            kasumi_blocks.append(merge_bytes(block_list))
-
-        return kasumi_blocks
+        return CipherMode._bytes_to_blocks(message_bytes)
 
     @staticmethod
     def _blocks_to_string(blocks: list, is_hex: bool = False) -> str:
         """
-        Converts 128-bit block list to a string
+        Converts a 64-bit block list to a string
         :param blocks: The block list
         :param is_hex: If the result have to be an hexadecimal string
         :return:
         """
-        msg_bytes = bytearray()
-        for block in blocks:
-            msg_bytes = msg_bytes + split_bytes(block)
+        msg_bytes = CipherMode._blocks_to_bytes(blocks)
 
         return msg_bytes.hex() if is_hex else msg_bytes.decode().rstrip('\x00')
 
-    @abc.abstractmethod
+    @staticmethod
+    def _read_chunks(reader, chunk_size: int):
+        """
+        Reads the reader until its end by chunks of whole blocks, only the last chunk can be shorter than a block
+        :param reader: Object with a read(size) method returning bytes (binary file, socket file, mmap...)
+        :param chunk_size: Maximum size of the chunks in bytes, rounded down to a multiple of 8
+        :return: Generator of the chunks
+        """
+        chunk_size = max(8, chunk_size - chunk_size % 8)
+        pending = b''  # Bytes of an incomplete block which was cut by the reader
+        while True:
+            data = reader.read(chunk_size)
+            if not data:
+                break
+
+            if pending:
+                data = pending + data
+
+            aligned_size = len(data) - len(data) % 8
+            pending = data[aligned_size:]
+            if aligned_size:
+                yield memoryview(data)[:aligned_size]
+
+        if pending:
+            yield pending
+
+    def _is_parallel(self, nb_blocks: int) -> bool:
+        """
+        Tells if the blocks should be processed by several processes
+        :param nb_blocks: Number of blocks to process
+        :return:
+        """
+        return self.workers > 1 and nb_blocks > self.chunk_size
+
+    def _run_parallel(self, function, key: KasumiKey, blocks: list, *chunks_args) -> list:
+        """
+        Splits the blocks into chunks processed by the function of the parallel module in a pool of processes
+        :param function: Chunk function of the parallel module
+        :param key: Expanded key
+        :param blocks: The blocks to split into chunks
+        :param chunks_args: Other arguments of the function, their value for every chunk
+        :return: The processed blocks, in order
+        """
+        chunks = [blocks[i:i + self.chunk_size] for i in range(0, len(blocks), self.chunk_size)]
+
+        # The pool is started once per operation, the workers receive the expanded key only once
+        if self.__executor is None or self.__executor_key is not key:
+            self._close_executor()
+            self.__executor = parallel.create_pool(key, self.workers)
+            self.__executor_key = key
+
+        return parallel.run_chunks(function, self.__executor, *chunks_args, chunks)
+
+    def _close_executor(self):
+        """
+        Shuts down the pool of processes of the operation, if one was started
+        :return:
+        """
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
+            self.__executor_key = None
+
+    def _encrypt_message(self, blocks: list, key: KasumiKey, iv: str) -> list:
+        """
+        Encrypts all the blocks of a message
+        :param blocks: 64-bit message blocks
+        :param key: Expanded key
+        :param iv: Initialization vector as an hexadecimal string
+        :return: The encrypted blocks
+        """
+        state = self._initial_state(key, iv)
+        try:
+            blocks, state = self._encrypt_blocks(blocks, key, state)
+        finally:
+            self._close_executor()
+
+        return blocks + self._final_blocks(key, state)
+
+    def _decrypt_message(self, blocks: list, key: KasumiKey, iv: str) -> list:
+        """
+        Decrypts all the blocks of an encrypted message
+        :param blocks: 64-bit encrypted blocks
+        :param key: Expanded key
+        :param iv: Initialization vector as an hexadecimal string
+        :return: The decrypted blocks
+        """
+        trailer_index = max(0, len(blocks) - self._trailer_size)
+        trailer = blocks[trailer_index:]
+        del blocks[trailer_index:]
+
+        state = self._initial_state(key, iv)
+        try:
+            blocks, state = self._decrypt_blocks(blocks, key, state)
+        finally:
+            self._close_executor()
+        self._check_trailer(key, state, trailer)
+
+        return blocks
+
     def encrypt(self, message: str, key: str, iv: str) -> str:
-        """ Encrypt the given message with the key """
+        """
+        Encrypt the given message with the key
+        :param message: The message
+        :param key: 128-bit key as an hexadecimal string
+        :param iv: Initialization vector as an hexadecimal string
+        :return: The encrypted message as an hexadecimal string
+        """
+        kasumi_blocks = self._string_to_blocks(message)
+
+        return self._blocks_to_string(self._encrypt_message(kasumi_blocks, Kasumi.expand_key(int(key, 16)), iv), True)
+
+    def decrypt(self, message: str, key: str, iv: str) -> str:
+        """
+        Decrypt the encrypted message with the key
+        :param message: The encrypted message as an hexadecimal string
+        :param key: 128-bit key as an hexadecimal string
+        :param iv: Initialization vector as an hexadecimal string
+        :return: The decrypted message
+        """
+        kasumi_blocks = self._string_to_blocks(message, True)
+
+        return self._blocks_to_string(self._decrypt_message(kasumi_blocks, Kasumi.expand_key(int(key, 16)), iv))
+
+    def encrypt_bytes(self, message: Union[bytes, bytearray, memoryview], key: str, iv: str) -> bytes:
+        """
+        Encrypt the given bytes with the key
+        :param message: The bytes to encrypt
+        :param key: 128-bit key as an hexadecimal string
+        :param iv: Initialization vector as an hexadecimal string
+        :return: The encrypted bytes
+        """
+        kasumi_blocks = self._bytes_to_blocks(message)
+
+        return self._blocks_to_bytes(self._encrypt_message(kasumi_blocks, Kasumi.expand_key(int(key, 16)), iv))
+
+    def decrypt_bytes(self, message: Union[bytes, bytearray, memoryview], key: str, iv: str,
+                      length: int = None) -> bytes:
+        """
+        Decrypt the encrypted bytes with the key
+        :param message: The encrypted bytes
+        :param key: 128-bit key as an hexadecimal string
+        :param iv: Initialization vector as an hexadecimal string
+        :param length: Length of the original message, if not given the zero padding of the last block is removed
+        :return: The decrypted bytes
+        """
+        kasumi_blocks = self._bytes_to_blocks(message)
+        msg_bytes = self._blocks_to_bytes(self._decrypt_message(kasumi_blocks, Kasumi.expand_key(int(key, 16)), iv))
+
+        return msg_bytes[:length] if length is not None else msg_bytes.rstrip(b'\x00')
+
+    def encrypt_stream(self, reader, writer, key: str, iv: str, chunk_size: int = 1 << 20) -> int:
+        """
+        Encrypt everything read from the reader and write it to the writer, one chunk at a time. The chaining state of
+        the mode is carried from one chunk to the next so the result is the same as encrypt_bytes
+        :param reader: Object with a read(size) method returning bytes
+        :param writer: Object with a write(bytes) method
+        :param key: 128-bit key as an hexadecimal string
+        :param iv: Initialization vector as an hexadecimal string
+        :param chunk_size: Number of bytes read at once
+        :return: The number of bytes read (length of the message)
+        """
+        key = Kasumi.expand_key(int(key, 16))
+        state = self._initial_state(key, iv)
+        length = 0
+
+        try:  # The pool of processes is kept for all the chunks
+            for chunk in self._read_chunks(reader, chunk_size):
+                length += len(chunk)
+                blocks, state = self._encrypt_blocks(self._bytes_to_blocks(chunk), key, state)
+                writer.write(self._blocks_to_bytes(blocks))
+        finally:
+            self._close_executor()
+
+        writer.write(self._blocks_to_bytes(self._final_blocks(key, state)))
+
+        return length
+
+    def decrypt_stream(self, reader, writer, key: str, iv: str, chunk_size: int = 1 << 20,
+                       length: int = None) -> int:
+        """
+        Decrypt everything read from the reader and write it to the writer, one chunk at a time. The result is the same
+        as decrypt_bytes: without length, all the zeros at the end of the message are removed
+        :param reader: Object with a read(size) method returning bytes
+        :param writer: Object with a write(bytes) method
+        :param key: 128-bit key as an hexadecimal string
+        :param iv: Initialization vector as an hexadecimal string
+        :param chunk_size: Number of bytes read at once
+        :param length: Length of the original message, if not given the zero padding of the last block is removed
+        :return: The number of bytes written
+        """
+        key = Kasumi.expand_key(int(key, 16))
+        state = self._initial_state(key, iv)
+        trailer_bytes = 8 * self._trailer_size
+        pending = b''  # Last encrypted bytes, kept until the end as they may be the trailer of the mode
+        zeros = 0  # Number of decrypted zeros not written yet, they are the padding if nothing else follows
+        written = 0
+
+        try:  # The pool of processes is kept for all the chunks
+            for chunk in self._read_chunks(reader, chunk_size):
+                data = pending + chunk if pending else chunk
+                cut_index = max(0, len(data) - trailer_bytes)
+                pending = bytes(data[cut_index:])
+                if cut_index == 0:
+                    continue
+
+                blocks, state = self._decrypt_blocks(self._bytes_to_blocks(data[:cut_index]), key, state)
+                decrypted = self._blocks_to_bytes(blocks)
+
+                if length is not None:  # The padding is known to be after length bytes
+                    decrypted = decrypted[:max(0, length - written)]
+                else:
+                    stripped = decrypted.rstrip(b'\x00')
+                    if stripped and zeros:  # The zeros were part of the message
+                        writer.write(bytes(zeros))
+                        written += zeros
+                        zeros = 0
+                    zeros += len(decrypted) - len(stripped)
+                    decrypted = stripped
+
+                writer.write(decrypted)
+                written += len(decrypted)
+        finally:
+            self._close_executor()
+
+        self._check_trailer(key, state, self._bytes_to_blocks(pending))
+
+        return written
+
+    @staticmethod
+    def _iv_to_int(iv: str) -> int:
+        """
+        Converts the initialization vector to an integer, it is used as a 64-bit block by the modes
+        :param iv: Initialization vector as an hexadecimal string
+        :return:
+        """
+        iv = int(iv, 16)
+        if iv >> 64:
+            raise ValueError('The initialization vector must be 64 bits or lesser')
+
+        return iv
+
+    def _initial_state(self, key: KasumiKey, iv: str):
+        """
+        Gives the chaining state of the mode before the first block (by default the previous block is the IV)
+        :param key: Expanded key
+        :param iv: Initialization vector as an hexadecimal string
+        :return:
+        """
+        return self._iv_to_int(iv)
+
+    def _final_blocks(self, key: KasumiKey, state) -> list:
+        """
+        Gives the blocks appended at the end of the encrypted message (none by default)
+        :param key: Expanded key
+        :param state: Chaining state after the last block
+        :return:
+        """
+        return []
+
+    def _check_trailer(self, key: KasumiKey, state, trailer: list):
+        """
+        Checks the blocks appended at the end of the encrypted message (none by default)
+        :param key: Expanded key
+        :param state: Chaining state after the last block
+        :param trailer: The last _trailer_size encrypted blocks
+        :return:
+        """
+
+    @abc.abstractmethod
+    def _encrypt_blocks(self, blocks: list, key: KasumiKey, state) -> (list, object):
+        """ Encrypt the 64-bit message blocks with the key and gives the encrypted blocks and the next state """
         raise NotImplementedError
 
     @abc.abstractmethod
-    def decrypt(self, message: str, key: str, iv: str) -> str:
-        """ Decrypt the encrypted message with the key"""
+    def _decrypt_blocks(self, blocks: list, key: KasumiKey, state) -> (list, object):
+        """ Decrypt the 64-bit encrypted blocks with the key and gives the decrypted blocks and the next state """
         raise NotImplementedError
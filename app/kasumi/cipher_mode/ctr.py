@@ -1,48 +1,45 @@
+from app.kasumi import parallel
 from app.kasumi.cipher_mode.cipher_mode import CipherMode
-from app.kasumi.kasumi import Kasumi
+from app.kasumi.kasumi import Kasumi, KasumiKey
 
 
 class CTR(CipherMode):
 
-    def __init__(self, kasumi: Kasumi):
-        super().__init__(kasumi)
+    def __init__(self, kasumi: Kasumi, workers: int = 1, chunk_size: int = 4096):
+        super().__init__(kasumi, workers, chunk_size)
 
-    def encrypt(self, message: str, key: str, iv: str) -> str:
+    def _encrypt_blocks(self, blocks: list, key: KasumiKey, state) -> (list, object):
         """
-        Encrypts message with key using Counter mode
-        :param message:
-        :param key:
-        :param iv:
-        :return:
+        Encrypts message blocks with key using Counter mode
+        :param blocks: 64-bit message blocks
+        :param key: Expanded key
+        :param state: Counter of the first block (the IV for the first block of the message)
+        :return: The encrypted blocks and the next state
         """
 
-        kasumi_blocks = super()._string_to_blocks(message)
-        key = int(key, 16)
-        iv = int(iv, 16)
+        counter = state
 
-        # Counter
-        for i in range(len(kasumi_blocks)):
-            # i is used as the counter (iv is supposed to be concatenated instead of xored but this is fine)
-            kasumi_blocks[i] = self.kasumi.encrypt((iv + i) % 2**128, key) ^ kasumi_blocks[i]
+        if self._is_parallel(len(blocks)):  # Keystream blocks only depend on their counter
+            first_counters = range(counter, counter + len(blocks), self.chunk_size)
+            return self._run_parallel(parallel.counter_chunk, key, blocks, first_counters), counter + len(blocks)
 
-        return super()._blocks_to_string(kasumi_blocks, True)
+        # Counter (the keystream blocks are encrypted all at once)
+        # i is used as the counter (iv is supposed to be concatenated instead of xored but this is fine)
+        # The counter wraps around at 64 bits, the size of a block
+        keystream = self.kasumi.encrypt_blocks([(counter + i) % 2**64 for i in range(len(blocks))], key)
+        for i in range(len(blocks)):
+            blocks[i] ^= keystream[i]
 
-    def decrypt(self, message: str, key: str, iv: str) -> str:
+        return blocks, counter + len(blocks)
+
+    def _decrypt_blocks(self, blocks: list, key: KasumiKey, state) -> (list, object):
         """
-        Decrypts message with key using Counter mode
-        :param message:
-        :param key:
-        :param iv:
-        :return:
+        Decrypts encrypted blocks with key using Counter mode
+        :param blocks: 64-bit encrypted blocks
+        :param key: Expanded key
+        :param state: Counter of the first block (the IV for the first block of the message)
+        :return: The decrypted blocks and the next state
         """
 
-        kasumi_blocks = super()._string_to_blocks(message, True)
-        key = int(key, 16)
-        iv = int(iv, 16)
-
-        # Counter
-        for i in range(len(kasumi_blocks)):
-            # i is used as the counter (iv is supposed to be concatenated instead of xored but this is fine)
-            kasumi_blocks[i] = self.kasumi.encrypt((iv + i) % 2 ** 128, key) ^ kasumi_blocks[i]
-
-        return super()._blocks_to_string(kasumi_blocks)
+        # The keystream is the same in both directions
+        return self._encrypt_blocks(blocks, key, state)
@@ -1,43 +1,43 @@
+from app.kasumi import parallel
 from app.kasumi.cipher_mode.cipher_mode import CipherMode
-from app.kasumi.kasumi import Kasumi
+from app.kasumi.kasumi import Kasumi, KasumiKey
 
 
 class ECB(CipherMode):
 
-    def __init__(self, kasumi: Kasumi):
-        super().__init__(kasumi)
+    def __init__(self, kasumi: Kasumi, workers: int = 1, chunk_size: int = 4096):
+        super().__init__(kasumi, workers, chunk_size)
 
-    def encrypt(self, message: str, key: str, iv: str) -> str:
+    def _initial_state(self, key: KasumiKey, iv: str):
+        """ ECB has no chaining state and no IV """
+        return None
+
+    def _encrypt_blocks(self, blocks: list, key: KasumiKey, state) -> (list, object):
         """
-        Encrypts message with key using ECB mode
-        :param message:
-        :param key:
-        :param iv:
-        :return:
+        Encrypts message blocks with key using ECB mode
+        :param blocks: 64-bit message blocks
+        :param key: Expanded key
+        :param state: Unused
+        :return: The encrypted blocks and the next state
         """
 
-        kasumi_blocks = super()._string_to_blocks(message)
-        key = int(key, 16)
-
-        # ECB
-        for i in range(len(kasumi_blocks)):
-            kasumi_blocks[i] = self.kasumi.encrypt(kasumi_blocks[i], key)
+        if self._is_parallel(len(blocks)):  # Blocks are independent
+            return self._run_parallel(parallel.encrypt_chunk, key, blocks), state
 
-        return super()._blocks_to_string(kasumi_blocks, True)
+        # ECB (all the blocks at once)
+        return self.kasumi.encrypt_blocks(blocks, key), state
 
-    def decrypt(self, message: str, key: str, iv: str) -> str:
+    def _decrypt_blocks(self, blocks: list, key: KasumiKey, state) -> (list, object):
         """
-        Decrypts message with key using ECB mode
-        :param message:
-        :param key:
-        :param iv:
-        :return:
+        Decrypts encrypted blocks with key using ECB mode
+        :param blocks: 64-bit encrypted blocks
+        :param key: Expanded key
+        :param state: Unused
+        :return: The decrypted blocks and the next state
         """
-        kasumi_blocks = super()._string_to_blocks(message, True)
-        key = int(key, 16)
 
-        # ECB
-        for i in range(len(kasumi_blocks)):
-            kasumi_blocks[i] = self.kasumi.decrypt(kasumi_blocks[i], key)
+        if self._is_parallel(len(blocks)):  # Blocks are independent
+            return self._run_parallel(parallel.decrypt_chunk, key, blocks), state
 
-        return super()._blocks_to_string(kasumi_blocks)
+        # ECB (all the blocks at once)
+        return self.kasumi.decrypt_blocks(blocks, key), state
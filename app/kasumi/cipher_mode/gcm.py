@@ -1,73 +1,86 @@
 from app.kasumi.cipher_mode.cipher_mode import CipherMode
-from app.kasumi.galois_field import multiply_galois_64
-from app.kasumi.kasumi import Kasumi
+from app.kasumi.galois_field import GaloisField64
+from app.kasumi.kasumi import Kasumi, KasumiKey
 
 
 class GCM(CipherMode):
 
-    def __init__(self, kasumi: Kasumi):
-        super().__init__(kasumi)
+    _trailer_size = 1  # Authentication tag
 
-    def encrypt(self, message: str, key: str, iv: str) -> str:
+    def __init__(self, kasumi: Kasumi, workers: int = 1, chunk_size: int = 4096):
+        super().__init__(kasumi, workers, chunk_size)
+
+    def _initial_state(self, key: KasumiKey, iv: str):
         """
-        Encrypts message with key using Galois Counter Mode
-        :param message:
-        :param key:
-        :param iv:
-        :return:
+        Gives the state of the Galois Counter Mode before the first block
+        :param key: Expanded key
+        :param iv: Initialization vector as an hexadecimal string
+        :return: [iv, number of processed blocks, GHASH accumulator, GHASH multiplier, encrypted IV]
         """
+        iv = self._iv_to_int(iv)
+        h = GaloisField64(self.kasumi.encrypt(0, key))  # Multiplication tables of the hash key
+        zero_count_block = self.kasumi.encrypt(iv, key)
 
-        kasumi_blocks = super()._string_to_blocks(message)
-        key = int(key, 16)
-        iv = int(iv, 16)
+        return [iv, 0, 0, h, zero_count_block]
 
-        tag = 0
-        h = self.kasumi.encrypt(0, key)
+    def _encrypt_blocks(self, blocks: list, key: KasumiKey, state) -> (list, object):
+        """
+        Encrypts message blocks with key using Galois Counter Mode
+        :param blocks: 64-bit message blocks
+        :param key: Expanded key
+        :param state: State of the mode given by _initial_state
+        :return: The encrypted blocks and the next state
+        """
 
-        zero_count_block = self.kasumi.encrypt(iv, key)
+        iv, nb_blocks, tag, h, zero_count_block = state
 
         # Galois Counter Mode
-        for i in range(len(kasumi_blocks)):
+        for i in range(len(blocks)):
             # i is used as the counter (iv is supposed to be concatenated instead of xored but this is fine)
-            kasumi_blocks[i] = self.kasumi.encrypt((iv + i + 1) % 2**128, key) ^ kasumi_blocks[i]
-            tag = multiply_galois_64(tag ^ kasumi_blocks[i], h)
-
-        tag = multiply_galois_64(tag ^ len(kasumi_blocks), h)
-        tag ^= zero_count_block
-        kasumi_blocks.append(tag)
+            blocks[i] = self.kasumi.encrypt((iv + nb_blocks + i + 1) % 2**64, key) ^ blocks[i]
+            tag = h.multiply(tag ^ blocks[i])
 
-        return super()._blocks_to_string(kasumi_blocks, True)
+        return blocks, [iv, nb_blocks + len(blocks), tag, h, zero_count_block]
 
-    def decrypt(self, message: str, key: str, iv: str) -> str:
+    def _decrypt_blocks(self, blocks: list, key: KasumiKey, state) -> (list, object):
         """
-        Decrypts message with key using Galois Counter Mode
-        :param message:
-        :param key:
-        :param iv:
-        :return:
+        Decrypts encrypted blocks with key using Galois Counter Mode
+        :param blocks: 64-bit encrypted blocks (without the authentication tag)
+        :param key: Expanded key
+        :param state: State of the mode given by _initial_state
+        :return: The decrypted blocks and the next state
         """
 
-        kasumi_blocks = super()._string_to_blocks(message, True)
-        key = int(key, 16)
-        iv = int(iv, 16)
-
-        tag = 0
-        h = self.kasumi.encrypt(0, key)
-
-        zero_count_block = self.kasumi.encrypt(iv, key)
+        iv, nb_blocks, tag, h, zero_count_block = state
 
         # Galois Counter Mode
-        for i in range(len(kasumi_blocks) - 1):
-            tag = multiply_galois_64(tag ^ kasumi_blocks[i], h)
+        for i in range(len(blocks)):
+            tag = h.multiply(tag ^ blocks[i])
             # i is used as the counter (iv is supposed to be concatenated instead of xored but this is fine)
-            kasumi_blocks[i] = self.kasumi.encrypt((iv + i + 1) % 2 ** 128, key) ^ kasumi_blocks[i]
+            blocks[i] = self.kasumi.encrypt((iv + nb_blocks + i + 1) % 2**64, key) ^ blocks[i]
+
+        return blocks, [iv, nb_blocks + len(blocks), tag, h, zero_count_block]
+
+    def _final_blocks(self, key: KasumiKey, state) -> list:
+        """
+        Gives the authentication tag appended to the encrypted message
+        :param key: Expanded key
+        :param state: State of the mode after the last block
+        :return:
+        """
+        _, nb_blocks, tag, h, zero_count_block = state
 
-        tag = multiply_galois_64(tag ^ (len(kasumi_blocks) - 1), h)
-        tag ^= zero_count_block
+        return [h.multiply(tag ^ nb_blocks) ^ zero_count_block]
 
-        if tag == kasumi_blocks[len(kasumi_blocks) - 1]:
+    def _check_trailer(self, key: KasumiKey, state, trailer: list):
+        """
+        Checks the authentication tag of the decrypted message
+        :param key: Expanded key
+        :param state: State of the mode after the last block
+        :param trailer: The authentication tag
+        :return:
+        """
+        if trailer == self._final_blocks(key, state):
             print("Message GCM intègre!")
         else:
             print("problème d'intégrité  du message!")
-
-        return super()._blocks_to_string(kasumi_blocks[:len(kasumi_blocks) - 1])
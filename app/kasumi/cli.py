@@ -5,9 +5,11 @@ from app.kasumi.cipher_mode.gcm import GCM
 from app.kasumi.cipher_mode.ofb import OFB
 from app.kasumi.cipher_mode.ecb import ECB
 from app.kasumi.cipher_mode.pcbc import PCBC
+from app.kasumi.container import encrypt_to_container, decrypt_container, export_hex, is_container
 from app.kasumi.kasumi import Kasumi
+import os
 from os import path
-from app.utils.file_manager import file_loader, add_to_filename, write_file, read_file
+from app.utils.file_manager import file_loader, file_selector, add_to_filename, read_file, HexReader
 
 path_data = path.join(path.abspath(path.dirname(__file__)), '../../data/')
 path_keys = path.join(path_data, 'keys/')
@@ -31,9 +33,9 @@ def encrypt():
     """
 
     # Message
-    message, filename, q_pressed = file_loader("Fichier du dossier data à chiffrer (kasumi.txt par défaut) :",
-                                               "kasumi.txt",
-                                               path_data)
+    message_path, filename, q_pressed = file_selector("Fichier du dossier data à chiffrer (kasumi.txt par défaut) :",
+                                                      "kasumi.txt",
+                                                      path_data)
     if q_pressed:
         return
 
@@ -54,20 +56,31 @@ def encrypt():
                                    "entrée pour ECB) :",
                                    "iv.txt",
                                    path_ivs)
+    if not _is_valid_iv(iv):
+        return
 
-    # Creates cipher the desired cipher mode
+    # Creates cipher the desired cipher mode (large files are processed on all the cores if the mode allows it)
     cipher_mode = available_ciphermodes.get(cipher_name)
-    cipher = cipher_mode(Kasumi())
+    cipher = cipher_mode(Kasumi(), workers=os.cpu_count() or 1)
+
+    # Add '-encrypted' to the filename, the encrypted file is a binary container (.ksm)
+    filename = add_to_filename(filename, '-encrypted') + '.ksm'
+    container_path = path.join(path_data, filename)
 
-    encrypted = cipher.encrypt(message, key, iv)
+    # The file is encrypted by chunks
+    with open(message_path, 'rb') as reader, open(container_path, 'wb') as writer:
+        encrypt_to_container(reader, writer, cipher, key, iv)
 
-    # Add '-encrypted' to the filename
-    filename = add_to_filename(filename, '-encrypted')
+    print('Chiffré dans ', filename)
 
-    write_file(path.join(path_data, filename), encrypted)
+    # Optional export of the encrypted blocks as an hexadecimal string (legacy format)
+    print('Exporter aussi le message chiffré en hexadécimal ? (o/N)')
+    if input().lower() == 'o':
+        hex_filename = filename[:-len('.ksm')].replace('-encrypted', '-encrypted-hex')
+        with open(path.join(path_data, hex_filename), 'w') as writer:
+            export_hex(container_path, writer)
 
-    print('Chiffré :')
-    print(encrypted)
+        print('Exporté dans ', hex_filename)
 
 
 def decrypt():
@@ -77,9 +90,9 @@ def decrypt():
     """
 
     # Message
-    message, filename, q_pressed = file_loader(
-        "Fichier du dossier data à déchiffrer (kasumi-encrypted.txt par défaut) :",
-        "kasumi-encrypted.txt",
+    message_path, filename, q_pressed = file_selector(
+        "Fichier du dossier data à déchiffrer (kasumi-encrypted.txt.ksm par défaut) :",
+        "kasumi-encrypted.txt.ksm",
         path_data
     )
     if q_pressed:
@@ -92,6 +105,20 @@ def decrypt():
     if q_pressed:
         return
 
+    # Add '-decrypted' to the filename
+    if filename.endswith('.ksm'):
+        filename = filename[:-len('.ksm')]
+    filename = add_to_filename(filename, '-decrypted')
+
+    # The cipher mode and the IV of a container are in its header
+    if is_container(message_path):
+        with open(path.join(path_data, filename), 'wb') as writer:
+            decrypt_container(message_path, writer, key, Kasumi(), workers=os.cpu_count() or 1)
+
+        print('Déchiffré dans ', filename)
+        return
+
+    # Legacy hexadecimal file
     # Cipher mode
     cipher_name, q_pressed = _get_cipher_name()
     if q_pressed:
@@ -102,20 +129,18 @@ def decrypt():
                                    "entrée pour ECB) :",
                                    "iv.txt",
                                    path_ivs)
+    if not _is_valid_iv(iv):
+        return
 
-    # Creates cipher the desired cipher mode
+    # Creates cipher the desired cipher mode (large files are processed on all the cores if the mode allows it)
     cipher_mode = available_ciphermodes.get(cipher_name)
-    cipher = cipher_mode(Kasumi())
+    cipher = cipher_mode(Kasumi(), workers=os.cpu_count() or 1)
 
-    decrypted = cipher.decrypt(message, key, iv)
+    # The hexadecimal string of the encrypted file is decrypted by chunks
+    with open(message_path, 'r') as reader, open(path.join(path_data, filename), 'wb') as writer:
+        cipher.decrypt_stream(HexReader(reader), writer, key, iv)
 
-    # Add '-decrypted' to the filename
-    filename = add_to_filename(filename, '-decrypted')
-
-    write_file(path.join(path_data, filename), decrypted)
-
-    print('Déchiffré :')
-    print(decrypted)
+    print('Déchiffré dans ', filename)
 
 
 def all():
@@ -181,6 +206,19 @@ def all():
         print('GCM ok!\n')
 
 
+def _is_valid_iv(iv: str) -> bool:
+    """
+    Checks that the initialization vector fits in a 64-bit block (the empty IV of ECB is valid)
+    :param iv: Initialization vector as an hexadecimal string
+    :return:
+    """
+    if iv.strip() and int(iv, 16) >> 64:
+        print("Le vecteur d'initialisation doit faire 64 bits au maximum")
+        return False
+
+    return True
+
+
 def _get_cipher_name() -> (str, bool):
     """
     Get the desired cipher name from the user input
@@ -0,0 +1,139 @@
+import mmap
+import struct
+from app.kasumi.cipher_mode.cbc import CBC
+from app.kasumi.cipher_mode.cfb import CFB
+from app.kasumi.cipher_mode.cipher_mode import CipherMode
+from app.kasumi.cipher_mode.ctr import CTR
+from app.kasumi.cipher_mode.ecb import ECB
+from app.kasumi.cipher_mode.gcm import GCM
+from app.kasumi.cipher_mode.ofb import OFB
+from app.kasumi.cipher_mode.pcbc import PCBC
+from app.kasumi.kasumi import Kasumi
+from app.utils.file_manager import HexWriter
+
+# Binary container of an encrypted message :
+# magic (4 bytes) | version (1 byte) | mode id (1 byte) | IV (16 bytes) | message length (8 bytes) | encrypted blocks
+# The IV field has room for 128 bits but the cipher modes only accept IVs of 64 bits or lesser (one block)
+# The GCM authentication tag is the last encrypted block
+MAGIC = b'KSMI'
+VERSION = 1
+HEADER_FORMAT = '>4sBB16sQ'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# Identifier of every cipher mode in the container (never change an existing id)
+MODE_IDS = {
+    ECB: 1,
+    CBC: 2,
+    PCBC: 3,
+    CFB: 4,
+    OFB: 5,
+    CTR: 6,
+    GCM: 7,
+}
+MODES = {mode_id: cipher_mode for cipher_mode, mode_id in MODE_IDS.items()}
+
+
+def is_container(file_path: str) -> bool:
+    """
+    Tells if the file is a binary container (instead of the legacy hexadecimal string)
+    :param file_path:
+    :return:
+    """
+    with open(file_path, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def pack_header(cipher: CipherMode, iv: str, length: int) -> bytes:
+    """
+    Makes the header of a container
+    :param cipher: The cipher mode used
+    :param iv: Initialization vector as an hexadecimal string
+    :param length: Length of the message in bytes
+    :return:
+    """
+    iv = int(iv, 16) if iv.strip() else 0  # No IV for ECB
+    if iv >> 64:
+        raise ValueError('The initialization vector must be 64 bits or lesser')
+
+    return struct.pack(HEADER_FORMAT, MAGIC, VERSION, MODE_IDS[type(cipher)], iv.to_bytes(16, 'big'), length)
+
+
+def unpack_header(header: bytes) -> (type, str, int):
+    """
+    Reads the header of a container
+    :param header: The first HEADER_SIZE bytes of the container
+    :return: The cipher mode class, the IV as an hexadecimal string and the length of the message
+    """
+    if len(header) < HEADER_SIZE:
+        raise Exception('The container is too short')
+
+    magic, version, mode_id, iv, length = struct.unpack(HEADER_FORMAT, header[:HEADER_SIZE])
+    if magic != MAGIC:
+        raise Exception('Not a KASUMI container')
+    if version != VERSION:
+        raise Exception('Unsupported container version ' + str(version))
+    if mode_id not in MODES:
+        raise Exception('Unknown cipher mode id ' + str(mode_id))
+    if int.from_bytes(iv, 'big') >> 64:
+        raise Exception('The initialization vector of the container is longer than 64 bits')
+
+    return MODES[mode_id], hex(int.from_bytes(iv, 'big')), length
+
+
+def encrypt_to_container(reader, writer, cipher: CipherMode, key: str, iv: str, chunk_size: int = 1 << 20) -> int:
+    """
+    Encrypts everything read from the reader into a container, the length in the header is written once known
+    :param reader: Object with a read(size) method returning bytes
+    :param writer: Seekable binary file
+    :param cipher: The cipher mode to use
+    :param key: 128-bit key as an hexadecimal string
+    :param iv: Initialization vector as an hexadecimal string
+    :param chunk_size: Number of bytes read at once
+    :return: The length of the message
+    """
+    header_position = writer.tell()
+    writer.write(pack_header(cipher, iv, 0))
+    length = cipher.encrypt_stream(reader, writer, key, iv, chunk_size)
+
+    end_position = writer.tell()
+    writer.seek(header_position)
+    writer.write(pack_header(cipher, iv, length))
+    writer.seek(end_position)
+
+    return length
+
+
+def decrypt_container(file_path: str, writer, key: str, kasumi: Kasumi = None, workers: int = 1,
+                      chunk_size: int = 1 << 20) -> int:
+    """
+    Decrypts a container file, the cipher mode and the IV are read from its header
+    :param file_path: Path of the container
+    :param writer: Object with a write(bytes) method
+    :param key: 128-bit key as an hexadecimal string
+    :param kasumi: Kasumi instance to use (a new one if not given)
+    :param workers: Number of processes of the cipher mode
+    :param chunk_size: Number of bytes decrypted at once
+    :return: The length of the message
+    """
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        cipher_mode, iv, length = unpack_header(mapped[:HEADER_SIZE])
+        cipher = cipher_mode(kasumi or Kasumi(), workers=workers)
+
+        # The mapped file is read from the end of the header by the cipher mode
+        mapped.seek(HEADER_SIZE)
+        return cipher.decrypt_stream(mapped, writer, key, iv, chunk_size, length)
+
+
+def export_hex(file_path: str, writer, chunk_size: int = 1 << 20):
+    """
+    Writes the encrypted blocks of a container as an hexadecimal string (legacy format without header)
+    :param file_path: Path of the container
+    :param writer: Text file opened for writing
+    :param chunk_size: Number of bytes converted at once
+    :return:
+    """
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        unpack_header(mapped[:HEADER_SIZE])
+        hex_writer = HexWriter(writer)
+        for position in range(HEADER_SIZE, len(mapped), chunk_size):
+            hex_writer.write(mapped[position:position + chunk_size])
@@ -1,18 +1,129 @@
+from array import array
 from os import path
 import random
+import sys
 from pyfinite import ffield  # TODO Create our own implementation !
 
+# Inverse tables already built or loaded, by (bit_length, polynomial)
+_inverse_tables = {}
+
+
+def _multiply(a: int, b: int, polynomial: int, bit_length: int) -> int:
+    """
+    Multiplies a and b in the Galois Field of 2^bit_length defined by the irreducible polynomial
+    :param a:
+    :param b: Should be the smallest operand as the loop runs through its bits
+    :param polynomial: Irreducible polynomial of the field
+    :param bit_length: Degree of the polynomial
+    :return:
+    """
+    overflow = 1 << bit_length
+    result = 0
+    while b:
+        if b & 1:
+            result ^= a
+        b >>= 1
+        a <<= 1
+        if a & overflow:  # Reduce by the polynomial
+            a ^= polynomial
+
+    return result
+
+
+def _build_inverse_table(polynomial: int, bit_length: int) -> array:
+    """
+    Builds the table of the inverses of all the elements of the field with the powers of a generator element
+    (g^i)^-1 = g^(order - i). The inverse of 0 is set to 0
+    :param polynomial: Irreducible polynomial of the field
+    :param bit_length: Degree of the polynomial
+    :return: The inverse table, the inverse of 'a' is at index 'a'
+    """
+    order = (1 << bit_length) - 1  # Order of the multiplicative group
+
+    # Small elements are tried first because they are the fastest to multiply with
+    for generator in range(2, order + 1):
+        powers = [1]
+        elem = generator
+        while elem != 1:
+            powers.append(elem)
+            elem = _multiply(elem, generator, polynomial, bit_length)
+
+        if len(powers) == order:  # Generator !!!
+            break
+    else:
+        raise Exception('No generator found, the polynomial ' + str(polynomial) + ' is not irreducible')
+
+    inverse_table = array('H', bytes(2 * (order + 1)))
+    for i in range(order):
+        inverse_table[powers[i]] = powers[(order - i) % order]
+
+    return inverse_table
+
+
+# Irreducible polynomial of GF(2^64) used by the Galois Counter Mode
+_polynomial_64 = (2**64 + 2**63 + 2**62 + 2**60 + 2**59 + 2**57 + 2**54 + 2**53 + 2**52 + 2**51 + 2**46 + 2**44 +
+                  2**43 + 2**42 + 2**41 + 2**40 + 2**39 + 2**38 + 2**34 + 2**31 + 2**0)
+_mask_64 = (1 << 64) - 1
+
+# Reduction of the 8 bits overflowing a 64-bit element shifted by 8: _reduction_table_64[b] = b * x^64
+_reduction_table_64 = [_multiply(_polynomial_64 ^ (1 << 64), b, _polynomial_64, 64) for b in range(256)]
+
 
 def multiply_galois_64(a: int, b: int):
     """
     Multiplies a and b in a Galois Field of 2^64
-    :param a:
-    :param b:
+    To multiply many elements by the same b, use GaloisField64 instead
+    :param a: 64-bit element
+    :param b: 64-bit element
     :return:
     """
-    galois_128 = ffield.FField(64, 2**64 + 2**63 + 2**62 + 2**60 + 2**59 + 2**57 + 2**54 + 2**53 + 2**52 + 2**51 +
-                               2**46 + 2**44 + 2**43 + 2**42 + 2**41 + 2**40 + 2**39 + 2**38 + 2**34 + 2**31 + 2**0)
-    return galois_128.Multiply(a, b)
+    if a >> 64 or b >> 64:
+        raise ValueError('The elements of GF(2^64) must be 64 bits or lesser')
+
+    return _multiply(a, b, _polynomial_64, 64)
+
+
+class GaloisField64:
+    """
+    Multiplies elements of GF(2^64) by a fixed element h (the GHASH key) using Shoup's method with 8-bit tables
+    """
+
+    def __init__(self, h: int):
+        if h >> 64:
+            raise ValueError('The elements of GF(2^64) must be 64 bits or lesser')
+        self.h = h
+
+        # Multiples of h by all the 8-bit elements: table[b] = b * h
+        self.__table = [0] * 256
+        for b in range(1, 256):
+            double = self.__table[b >> 1] << 1  # (b >> 1) * h * x
+            if double >> 64:
+                double ^= _polynomial_64
+
+            self.__table[b] = double ^ h if b & 1 else double
+
+    def multiply(self, a: int) -> int:
+        """
+        Multiplies a by h, the 64-bit element is processed 8 bits at a time from its most significant byte
+        (Horner's method) : result = result * x^8 + byte * h
+        :param a: 64-bit element
+        :return: a * h
+        """
+        if a >> 64:  # The tables only cover 64-bit elements
+            raise ValueError('The elements of GF(2^64) must be 64 bits or lesser')
+
+        table = self.__table
+        reduction = _reduction_table_64
+        mask = _mask_64
+
+        result = table[a >> 56]
+        result = ((result << 8) & mask) ^ reduction[result >> 56] ^ table[(a >> 48) & 0xff]
+        result = ((result << 8) & mask) ^ reduction[result >> 56] ^ table[(a >> 40) & 0xff]
+        result = ((result << 8) & mask) ^ reduction[result >> 56] ^ table[(a >> 32) & 0xff]
+        result = ((result << 8) & mask) ^ reduction[result >> 56] ^ table[(a >> 24) & 0xff]
+        result = ((result << 8) & mask) ^ reduction[result >> 56] ^ table[(a >> 16) & 0xff]
+        result = ((result << 8) & mask) ^ reduction[result >> 56] ^ table[(a >> 8) & 0xff]
+        return ((result << 8) & mask) ^ reduction[result >> 56] ^ table[a & 0xff]
 
 
 class GaloisField:
@@ -20,7 +131,7 @@ class GaloisField:
     Manages a Galois Field of the form GF(2^n)
     """
 
-    def __init__(self, bit_length: int = 16, fn_poly: str = 'polynomial.txt'):
+    def __init__(self, bit_length: int = 16, fn_poly: str = 'polynomial.txt', persist_table: bool = True):
         self.irr_polys_8 = [
             2 ** 8 + 2 ** 4 + 2 ** 3 + 2 ** 2 + 2 ** 0,
             2 ** 8 + 2 ** 5 + 2 ** 3 + 2 ** 1 + 2 ** 0,
@@ -53,6 +164,7 @@ class GaloisField:
         self.bit_length = bit_length
         self.path_poly = path.join(path.join(path.abspath(path.dirname(__file__)), '../../data/'), fn_poly)
         self.galois_field = None
+        self.inverse_table = None
 
         if path.exists(self.path_poly):
             # Open previously written polynomial setting
@@ -66,6 +178,8 @@ class GaloisField:
         if self.polynomial == 0:
             self.__generate_polynomial()
 
+        self.__load_inverse_table(persist_table)
+
     def __generate_polynomial(self):
         """ Generates a generator element in the polynomial """
 
@@ -106,11 +220,44 @@ class GaloisField:
         with open(self.path_poly, 'w+') as file_poly:
             file_poly.write(str(self.bit_length) + ' ' + str(self.polynomial) + ' ' + str(self.generator))
 
+    def __load_inverse_table(self, persist_table: bool):
+        """
+        Loads the inverse table of the field. It is read from the data folder if it has already been built, else it is
+        built and written there (as an array of little endian 16-bit integers) when persist_table is true
+        :param persist_table: Write the table in the data folder after building it
+        :return:
+        """
+        table_key = (self.bit_length, self.polynomial)
+        if table_key in _inverse_tables:
+            self.inverse_table = _inverse_tables[table_key]
+            return
+
+        table_size = 1 << self.bit_length
+        path_table = path.join(path.dirname(self.path_poly),
+                               'gf_inverse_' + str(self.bit_length) + '_' + str(self.polynomial) + '.bin')
+
+        if path.exists(path_table) and path.getsize(path_table) == 2 * table_size:
+            self.inverse_table = array('H')
+            with open(path_table, 'rb') as file_table:
+                self.inverse_table.fromfile(file_table, table_size)
+            if sys.byteorder == 'big':
+                self.inverse_table.byteswap()
+        else:
+            self.inverse_table = _build_inverse_table(self.polynomial, self.bit_length)
+            if persist_table:
+                table_le = array('H', self.inverse_table)
+                if sys.byteorder == 'big':
+                    table_le.byteswap()
+                with open(path_table, 'wb') as file_table:
+                    table_le.tofile(file_table)
+
+        _inverse_tables[table_key] = self.inverse_table
+
     def inverse(self, a: int) -> int:
         """
-        Gives the inverse of 'a' in the irreducible polynomial
+        Gives the inverse of 'a' in the irreducible polynomial (0 is its own inverse)
         :param a: The number to get inverse off of it
         :return: The inverse of 'a'
         """
 
-        return self.galois_field.DoInverseForSmallField(a)
+        return self.inverse_table[a]
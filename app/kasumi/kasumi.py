@@ -1,11 +1,20 @@
+from functools import lru_cache
+from typing import Union
+
 from app.kasumi.galois_field import GaloisField
 from app.utils.bit_operation import left_circ_shift
 
+try:  # Optional, used to encrypt many blocks at once
+    import numpy as np
+except ImportError:
+    np = None
 
-class Kasumi:
-    """ Implementation of the KASUMI algorithm as described in the 3GPP specification with a few modifications """
 
-    def __init__(self):
+class KasumiKey:
+    """ Expanded KASUMI key: all the subkeys and S-boxes derived from a 128-bit key """
+
+    def __init__(self, key: int):
+        self.key = key
         self.round_keys = []
         self.round_keys_prime = []
         self.sub_keys_KL1 = []
@@ -16,77 +25,18 @@ class Kasumi:
         self.sub_keys_KI1 = []
         self.sub_keys_KI2 = []
         self.sub_keys_KI3 = []
-        self.sbox_fi_1 = []
-        self.sbox_fi_2 = []
-
-        self.galois_field = GaloisField()
-
-    def encrypt(self, message: int, key: int) -> int:
-        """
-        Encrypts the given message with the key
-        :param message: 64-bit message block
-        :param key: 128-bit key
-        :return: Encrypted message block
-        """
-        self.__key_schedule(key)
-
-        left = message >> 32
-        right = message & 0xffffffff
-
-        # Main feistel rounds
-        for nb_round in range(0, 8):
-            next_right = left
-            next_left = right ^ self.__main_f(left, nb_round)
-
-            # Swap left and right
-            right = next_right
-            left = next_left
-        return (left << 32) | right
+        self.sbox_fi_1 = bytearray()
+        self.sbox_fi_2 = bytearray()
 
-    def decrypt(self, message: int, key: int) -> int:
-        """
-        Decrypts the given message with the key
-        :param message: 64-bit encrypted message block
-        :param key: 128-bit key
-        :return: Decrypted message block
-        """
         self.__key_schedule(key)
 
-        left = message >> 32
-        right = message & 0xffffffff
-
-        # Main Feistel rounds
-        for nb_round in range(7, -1, -1):  # In reverse in order to have the key matching with encrypt
-            next_left = right
-            next_right = self.__main_f(right, nb_round) ^ left
-
-            # Swap left and right
-            left = next_left
-            right = next_right
-
-        return (left << 32) | right
-
     def __key_schedule(self, key: int):
         """
         Generate all the subkeys based on the 128bits main key
-        :param key: Main key as a string
+        :param key: Main key as an integer
         :return:
         """
 
-        # Reset the variables (might have been allocated before)
-        self.round_keys = []
-        self.round_keys_prime = []
-        self.sub_keys_KL1 = []
-        self.sub_keys_KL2 = []
-        self.sub_keys_KO1 = []
-        self.sub_keys_KO2 = []
-        self.sub_keys_KO3 = []
-        self.sub_keys_KI1 = []
-        self.sub_keys_KI2 = []
-        self.sub_keys_KI3 = []
-        self.sbox_fi_1 = []
-        self.sbox_fi_2 = []
-
         key_prime = key ^ 0x0123456789ABCDEFFEDCBA9876543210
 
         # Split keys in 8 parts
@@ -141,6 +91,173 @@ class Kasumi:
 
         return sbox
 
+
+@lru_cache(maxsize=64)
+def expand_key(key: int) -> KasumiKey:
+    """
+    Gives the expanded key of a 128-bit key. The key schedule is computed once per key and then cached
+    :param key: 128-bit key
+    :return: The expanded key
+    """
+    return KasumiKey(key)
+
+
+class Kasumi:
+    """ Implementation of the KASUMI algorithm as described in the 3GPP specification with a few modifications """
+
+    VECTOR_MIN_BLOCKS = 64  # Under this number of blocks, a list is encrypted block by block (numpy is not worth it)
+
+    def __init__(self):
+        self.expanded_key = None
+        self.round_keys = []
+        self.round_keys_prime = []
+        self.sub_keys_KL1 = []
+        self.sub_keys_KL2 = []
+        self.sub_keys_KO1 = []
+        self.sub_keys_KO2 = []
+        self.sub_keys_KO3 = []
+        self.sub_keys_KI1 = []
+        self.sub_keys_KI2 = []
+        self.sub_keys_KI3 = []
+        self.sbox_fi_1 = []
+        self.sbox_fi_2 = []
+
+        self.galois_field = GaloisField()
+        self.inverse_table = self.galois_field.inverse_table
+        self.inverse_array = None  # Inverse table as a numpy array, made the first time blocks are vectorized
+
+    @staticmethod
+    def expand_key(key: int) -> KasumiKey:
+        """
+        Gives the (cached) expanded key of a 128-bit key, it can be given to encrypt and decrypt instead of the key
+        :param key: 128-bit key
+        :return: The expanded key
+        """
+        return expand_key(key)
+
+    @staticmethod
+    def key_cache_info():
+        """
+        Gives the statistics of the expanded keys cache
+        :return: Named tuple with the hits, misses, maxsize and currsize of the cache
+        """
+        return expand_key.cache_info()
+
+    def encrypt(self, message: int, key: Union[int, KasumiKey]) -> int:
+        """
+        Encrypts the given message with the key
+        :param message: 64-bit message block
+        :param key: 128-bit key or its expanded key
+        :return: Encrypted message block
+        """
+        if message >> 64:  # The halves would not fit in the inverse table of FL
+            raise ValueError('The block must be 64 bits or lesser')
+        self.__key_schedule(key)
+
+        left = message >> 32
+        right = message & 0xffffffff
+
+        # Main feistel rounds
+        for nb_round in range(0, 8):
+            next_right = left
+            next_left = right ^ self.__main_f(left, nb_round)
+
+            # Swap left and right
+            right = next_right
+            left = next_left
+        return (left << 32) | right
+
+    def decrypt(self, message: int, key: Union[int, KasumiKey]) -> int:
+        """
+        Decrypts the given message with the key
+        :param message: 64-bit encrypted message block
+        :param key: 128-bit key or its expanded key
+        :return: Decrypted message block
+        """
+        if message >> 64:  # The halves would not fit in the inverse table of FL
+            raise ValueError('The block must be 64 bits or lesser')
+        self.__key_schedule(key)
+
+        left = message >> 32
+        right = message & 0xffffffff
+
+        # Main Feistel rounds
+        for nb_round in range(7, -1, -1):  # In reverse in order to have the key matching with encrypt
+            next_left = right
+            next_right = self.__main_f(right, nb_round) ^ left
+
+            # Swap left and right
+            left = next_left
+            right = next_right
+
+        return (left << 32) | right
+
+    def encrypt_blocks(self, blocks, key: Union[int, KasumiKey]):
+        """
+        Encrypts independent blocks with the same key. With numpy, the rounds are done on all the blocks at once
+        :param blocks: List or numpy array (uint64) of 64-bit message blocks
+        :param key: 128-bit key or its expanded key
+        :return: The encrypted blocks (same type as blocks)
+        """
+        if not self.__can_vectorize(blocks):
+            return [self.encrypt(block, key) for block in blocks]
+
+        self.__key_schedule(key)
+        left, right = self.__split_blocks(blocks)
+
+        # Main Feistel rounds
+        for nb_round in range(0, 8):
+            left, right = right ^ self.__vector_main_f(left, nb_round), left
+
+        return self.__join_blocks(left, right, blocks)
+
+    def decrypt_blocks(self, blocks, key: Union[int, KasumiKey]):
+        """
+        Decrypts independent blocks with the same key. With numpy, the rounds are done on all the blocks at once
+        :param blocks: List or numpy array (uint64) of 64-bit encrypted blocks
+        :param key: 128-bit key or its expanded key
+        :return: The decrypted blocks (same type as blocks)
+        """
+        if not self.__can_vectorize(blocks):
+            return [self.decrypt(block, key) for block in blocks]
+
+        self.__key_schedule(key)
+        left, right = self.__split_blocks(blocks)
+
+        # Main Feistel rounds
+        for nb_round in range(7, -1, -1):  # In reverse in order to have the key matching with encrypt
+            left, right = right, self.__vector_main_f(right, nb_round) ^ left
+
+        return self.__join_blocks(left, right, blocks)
+
+    def __key_schedule(self, key: Union[int, KasumiKey]):
+        """
+        Loads the subkeys and S-boxes of the key, the key schedule is only computed the first time a key is used
+        :param key: 128-bit key or its expanded key
+        :return:
+        """
+        if not isinstance(key, KasumiKey):
+            if self.expanded_key is not None and self.expanded_key.key == key:  # Already loaded
+                return
+            key = expand_key(key)
+
+        if key is self.expanded_key:
+            return
+
+        self.expanded_key = key
+        self.round_keys = key.round_keys
+        self.round_keys_prime = key.round_keys_prime
+        self.sub_keys_KL1 = key.sub_keys_KL1
+        self.sub_keys_KL2 = key.sub_keys_KL2
+        self.sub_keys_KO1 = key.sub_keys_KO1
+        self.sub_keys_KO2 = key.sub_keys_KO2
+        self.sub_keys_KO3 = key.sub_keys_KO3
+        self.sub_keys_KI1 = key.sub_keys_KI1
+        self.sub_keys_KI2 = key.sub_keys_KI2
+        self.sub_keys_KI3 = key.sub_keys_KI3
+        self.sbox_fi_1 = key.sbox_fi_1
+        self.sbox_fi_2 = key.sbox_fi_2
+
     @staticmethod
     def __string_to_int(string: str) -> int:
         """
@@ -164,10 +281,11 @@ class Kasumi:
         left = input_i >> 16  # shift by 16 to the right to get the big endian
         right = input_i & 0xffff  # Mask to get the right part to extract the little endian
 
-        # With inverse in a Galois field
+        # With inverse in a Galois field (precomputed table)
+        inverse_table = self.inverse_table
 
-        right_prime = self.galois_field.inverse(right ^ left_circ_shift(left & self.sub_keys_KL1[round_i], 1, 16))
-        left_prime = self.galois_field.inverse(left ^ left_circ_shift(right_prime | self.sub_keys_KL2[round_i], 1, 16))
+        right_prime = inverse_table[right ^ left_circ_shift(left & self.sub_keys_KL1[round_i], 1, 16)]
+        left_prime = inverse_table[left ^ left_circ_shift(right_prime | self.sub_keys_KL2[round_i], 1, 16)]
 
         return (left_prime << 16) | right_prime
 
@@ -222,3 +340,114 @@ class Kasumi:
             result = self.__fo(tmp, nb_round)
 
         return result
+
+    # Vectorized functions (numpy), same as the functions above on arrays of 32-bit values
+
+    def __can_vectorize(self, blocks) -> bool:
+        """
+        Tells if the blocks can be processed as a numpy array (numpy is installed, enough blocks, all of 64 bits)
+        :param blocks: List or numpy array of blocks
+        :return:
+        """
+        if np is None:
+            return False
+        if isinstance(blocks, np.ndarray):
+            return True
+
+        return len(blocks) >= self.VECTOR_MIN_BLOCKS and max(blocks) < 2**64
+
+    def __split_blocks(self, blocks) -> tuple:
+        """
+        Splits the blocks into two arrays of 32-bit halves
+        :param blocks: List or numpy array of 64-bit blocks
+        :return: The left and right halves
+        """
+        if self.inverse_array is None:
+            self.inverse_array = np.frombuffer(self.inverse_table, dtype=np.uint16).astype(np.uint32)
+
+        blocks = np.asarray(blocks, dtype=np.uint64)
+
+        return (blocks >> np.uint64(32)).astype(np.uint32), (blocks & np.uint64(0xffffffff)).astype(np.uint32)
+
+    @staticmethod
+    def __join_blocks(left, right, blocks):
+        """
+        Joins the 32-bit halves into 64-bit blocks
+        :param left: Left halves
+        :param right: Right halves
+        :param blocks: The original blocks, to give the result with the same type
+        :return:
+        """
+        result = (left.astype(np.uint64) << np.uint64(32)) | right.astype(np.uint64)
+
+        return result if isinstance(blocks, np.ndarray) else result.tolist()
+
+    @staticmethod
+    def __vector_rotate(x, shift: int, n_bits: int):
+        """
+        Left circular shift of every value of the array (see left_circ_shift)
+        :param x: Array of n_bits values
+        :param shift: The number of bits to shift
+        :param n_bits: The number of bits of the values
+        :return:
+        """
+        return ((x << np.uint32(shift)) & np.uint32((1 << n_bits) - 1)) | (x >> np.uint32(n_bits - shift))
+
+    def __vector_fl(self, input_i, round_i: int):
+        """
+        Function FL on an array of 32-bit inputs
+        :param input_i: 32-bit data inputs of the ith round
+        :param round_i: Number of the current round (between 0 and 7)
+        :return: 32-bit output values
+        """
+        left = input_i >> np.uint32(16)
+        right = input_i & np.uint32(0xffff)
+
+        # With inverse in a Galois field (table lookups on all the blocks)
+        inverse_array = self.inverse_array
+
+        right_prime = inverse_array[right ^ self.__vector_rotate(left & np.uint32(self.sub_keys_KL1[round_i]), 1, 16)]
+        left_prime = inverse_array[left ^ self.__vector_rotate(right_prime | np.uint32(self.sub_keys_KL2[round_i]),
+                                                               1, 16)]
+
+        return (left_prime << np.uint32(16)) | right_prime
+
+    def __vector_fo(self, input_i, round_i: int):
+        """
+        Function FO on an array of 32-bit inputs
+        :param input_i: 32-bit data inputs of the ith round
+        :param round_i: Number of the current round (between 0 and 7)
+        :return: 32-bit output values
+        """
+        left = input_i >> np.uint32(16)
+        right = input_i & np.uint32(0xffff)
+
+        # The output of the S-boxes of FI only depends on the key, it is the same for every block
+        z1 = np.uint32(self.__fi(0, self.sub_keys_KI1[round_i]))
+        z2 = np.uint32(self.__fi(0, self.sub_keys_KI2[round_i]))
+        z3 = np.uint32(self.__fi(0, self.sub_keys_KI3[round_i]))
+        two = np.uint32(2)
+
+        # Round 1
+        right_tmp = (((left ^ np.uint32(self.sub_keys_KO1[round_i])) >> two) ^ z1) ^ right
+        left_tmp = right
+        # Round 2
+        right = (((left_tmp ^ np.uint32(self.sub_keys_KO2[round_i])) >> two) ^ z2) ^ right_tmp
+        left = right_tmp
+        # Round 3
+        right_tmp = (((left ^ np.uint32(self.sub_keys_KO3[round_i])) >> two) ^ z3) ^ right
+        left_tmp = right
+
+        return (left_tmp << np.uint32(16)) | right_tmp
+
+    def __vector_main_f(self, input_i, nb_round: int):
+        """
+        Functions block of the main Feistel network on an array of inputs
+        :param input_i: Inputs of the round
+        :param nb_round: Round number
+        :return:
+        """
+        if nb_round % 2 == 0:  # When even : -> fo -> fl
+            return self.__vector_fl(self.__vector_fo(input_i, nb_round), nb_round)
+        else:  # When odd : -> fl -> fo
+            return self.__vector_fo(self.__vector_fl(input_i, nb_round), nb_round)
@@ -0,0 +1,97 @@
+from concurrent.futures import ProcessPoolExecutor
+from app.kasumi.kasumi import Kasumi, KasumiKey
+
+# Kasumi instance and expanded key of a worker process, set once when the worker starts
+_worker_kasumi = None
+_worker_key = None
+
+
+def _init_worker(key: KasumiKey):
+    """
+    Initializes a worker process with the expanded key, it is sent only once per worker
+    :param key: Expanded key
+    :return:
+    """
+    global _worker_kasumi, _worker_key
+    _worker_kasumi = Kasumi()
+    _worker_key = key
+
+
+def encrypt_chunk(blocks: list) -> list:
+    """
+    Encrypts each block of the chunk independently (ECB)
+    :param blocks: 64-bit blocks
+    :return: The encrypted blocks
+    """
+    return _worker_kasumi.encrypt_blocks(blocks, _worker_key)
+
+
+def decrypt_chunk(blocks: list) -> list:
+    """
+    Decrypts each block of the chunk independently (ECB)
+    :param blocks: 64-bit encrypted blocks
+    :return: The decrypted blocks
+    """
+    return _worker_kasumi.decrypt_blocks(blocks, _worker_key)
+
+
+def counter_chunk(first_counter: int, blocks: list) -> list:
+    """
+    Xors the blocks of the chunk with the keystream of the counter mode
+    :param first_counter: Counter of the first block of the chunk
+    :param blocks: 64-bit blocks
+    :return: The xored blocks
+    """
+    keystream = _worker_kasumi.encrypt_blocks([(first_counter + i) % 2**64 for i in range(len(blocks))], _worker_key)
+    return [keystream_block ^ block for keystream_block, block in zip(keystream, blocks)]
+
+
+def cbc_decrypt_chunk(prev_block: int, blocks: list) -> list:
+    """
+    Decrypts a chunk of CBC encrypted blocks
+    :param prev_block: Encrypted block preceding the chunk (the IV for the first chunk)
+    :param blocks: 64-bit encrypted blocks
+    :return: The decrypted blocks
+    """
+    decrypted_blocks = _worker_kasumi.decrypt_blocks(blocks, _worker_key)
+    for i, block in enumerate(blocks):
+        decrypted_blocks[i] ^= prev_block
+        prev_block = block
+
+    return decrypted_blocks
+
+
+def cfb_decrypt_chunk(prev_block: int, blocks: list) -> list:
+    """
+    Decrypts a chunk of CFB encrypted blocks
+    :param prev_block: Encrypted block preceding the chunk (the IV for the first chunk)
+    :param blocks: 64-bit encrypted blocks
+    :return: The decrypted blocks
+    """
+    keystream = _worker_kasumi.encrypt_blocks([prev_block] + blocks[:-1], _worker_key)
+    return [keystream_block ^ block for keystream_block, block in zip(keystream, blocks)]
+
+
+def create_pool(key: KasumiKey, workers: int) -> ProcessPoolExecutor:
+    """
+    Starts a pool of processes initialized with the expanded key, to reuse for all the chunks of an operation
+    :param key: Expanded key sent once to every worker
+    :param workers: Number of processes
+    :return: The pool, to shut down when the operation is over
+    """
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(key,))
+
+
+def run_chunks(function, executor: ProcessPoolExecutor, *chunks_args) -> list:
+    """
+    Runs the function on every chunk in a pool of processes and gathers the results in the order of the chunks
+    :param function: Chunk function of this module
+    :param executor: Pool of processes made by create_pool with the key of the chunks
+    :param chunks_args: For each argument of the function, the list of its value for every chunk
+    :return: The concatenated blocks returned for every chunk
+    """
+    blocks = []
+    for chunk_result in executor.map(function, *chunks_args):
+        blocks.extend(chunk_result)
+
+    return blocks
@@ -1,11 +1,59 @@
 from app.keys_generator.keys_manager.elgamal_keys import ElGamalKeysManager
-from app.keys_generator.keys_manager.rsa_keys import RSAKeysManager
+from app.keys_generator.keys_manager.rsa_keys import RSAKeysManager, DEFAULT_PUBLIC_EXPONENT, is_valid_rsa_prime
 from app.keys_generator.prime import Prime
+from app.keys_generator.prime_pool import PrimePool
+import os
 from os import path
 
 path_data = path.join(path.abspath(path.dirname(__file__)), '../../data/')
 path_primes = path.join(path_data, 'primes/')
 
+# Reserve of primes shared by all the commands of the CLI session, refilled in background once started
+prime_pool = None
+
+
+def get_prime_pool() -> PrimePool:
+    """
+    Gives the reserve of primes of the session, created and started at the first call
+    :return:
+    """
+    global prime_pool
+    if prime_pool is None:
+        prime_pool = PrimePool(workers=os.cpu_count() or 1)
+        prime_pool.start()
+
+    return prime_pool
+
+
+def stop_prime_pool():
+    """
+    Stops the background refill of the reserve of primes of the session (at the end of the session)
+    :return:
+    """
+    global prime_pool
+    if prime_pool is not None:
+        prime_pool.stop()
+        prime_pool = None
+
+
+def get_rsa_prime(prime_path: path, with_generator: bool = True, pool=get_prime_pool) -> int:
+    """
+    Gives the prime of the file to generate RSA keys with the default public exponent. A prime loaded from a file is
+    not always a safe prime: it is replaced by a new one if p - 1 is not coprime with the exponent
+    :param prime_path: File of the prime, generated if it does not exist
+    :param with_generator: Finds a generator of the generated prime
+    :param pool: PrimePool from which the prime is taken, or a function giving it
+    :return:
+    """
+    while True:
+        prime = Prime(prime_path, with_generator=with_generator, workers=os.cpu_count() or 1, pool=pool).get_prime()
+        if is_valid_rsa_prime(prime, DEFAULT_PUBLIC_EXPONENT):
+            return prime
+
+        print("Le nombre premier de " + path.basename(prime_path) + " n'est pas utilisable avec l'exposant public " +
+              str(DEFAULT_PUBLIC_EXPONENT) + ", un nouveau nombre premier est généré")
+        os.remove(prime_path)
+
 
 def generate_elgamal_keys():
     """
@@ -36,7 +84,7 @@ def generate_elgamal_keys():
     if keys_filename == '':
         keys_filename = 'key_default.txt'
 
-    prime = Prime(path.join(path_primes, prime_filename))
+    prime = Prime(path.join(path_primes, prime_filename), workers=os.cpu_count() or 1, pool=get_prime_pool)
     key_mngmt = ElGamalKeysManager(keys_filename, prime.get_prime(), prime.get_generator())
 
     print("Clé publique")
@@ -85,9 +133,9 @@ def generate_rsa_keys():
     if keys_filename == '':
         keys_filename = 'key_rsa_default.txt'
 
-    prime_p = Prime(path.join(path_primes, prime_p_filename), with_generator=False)
-    prime_q = Prime(path.join(path_primes, prime_q_filename), with_generator=False)
-    key_mngmt = RSAKeysManager(keys_filename, [prime_p.get_prime(), prime_q.get_prime()])
+    prime_p = get_rsa_prime(path.join(path_primes, prime_p_filename), with_generator=False)
+    prime_q = get_rsa_prime(path.join(path_primes, prime_q_filename), with_generator=False)
+    key_mngmt = RSAKeysManager(keys_filename, [prime_p, prime_q])
 
     print("Clé publique")
     print(key_mngmt.get_public_key())
@@ -132,7 +180,7 @@ def dh_key_exchange():
     if keys_b_filename == '':
         keys_b_filename = 'key_bob.txt'
 
-    prime = Prime(path.join(path_primes, prime_filename))
+    prime = Prime(path.join(path_primes, prime_filename), workers=os.cpu_count() or 1, pool=get_prime_pool)
     key_mgmt_a = ElGamalKeysManager(keys_a_filename, prime.get_prime(), prime.get_generator())
     key_mgmt_b = ElGamalKeysManager(keys_b_filename, prime.get_prime(), prime.get_generator())
     shared_key_a = key_mgmt_a.generate_shared_key(key_mgmt_b.get_public_key())
@@ -154,10 +202,23 @@ def dh_key_exchange():
         print("\nLes clés secrètes ne correspondent pas!")
 
 
+def fill_prime_pool():
+    """
+    CLI to generate primes in advance in the reserve of data/primes/pool
+    :return:
+    """
+    pool = get_prime_pool()
+    print("Nombres premiers en réserve : ", pool.metrics()['depth'])
+    print("Génération des nombres premiers manquants...")
+    pool.refill()
+    print("Nombres premiers en réserve : ", pool.metrics()['depth'])
+
+
 available_cmds = {
     1: generate_elgamal_keys,
     2: generate_rsa_keys,
-    3: dh_key_exchange
+    3: dh_key_exchange,
+    4: fill_prime_pool,
 }
 
 
@@ -171,6 +232,7 @@ def generate_keys():
         print("->1<- Générer un couple de clés ElGamal")
         print("->2<- Générer un couple de clés RSA")
         print("->3<- Partage de clé privé Diffie-Hellman")
+        print("->4<- Remplir la réserve de nombres premiers")
         cmd = input()
 
         if cmd == 'q':
@@ -198,7 +260,7 @@ def all():
 
     # Keys generation
     print("Génération d'un couple de clés ElGamal publique / privée")
-    prime = Prime(path.join(path_primes, "prime_default.txt"))
+    prime = Prime(path.join(path_primes, "prime_default.txt"), workers=os.cpu_count() or 1, pool=get_prime_pool)
     key_mngmt = ElGamalKeysManager("key_default.txt", prime.get_prime(), prime.get_generator())
     print("\nClé publique :")
     print(key_mngmt.get_public_key())
@@ -206,9 +268,9 @@ def all():
     print(key_mngmt.get_private_key())
 
     print("\nGénération d'un couple de clés RSA publique / privée")
-    prime_p = Prime(path.join(path_primes, "prime_p.txt"))
-    prime_q = Prime(path.join(path_primes, "prime_q.txt"))
-    key_mngmt = RSAKeysManager("key_rsa_default.txt", [prime_p.get_prime(), prime_q.get_prime()])
+    prime_p = get_rsa_prime(path.join(path_primes, "prime_p.txt"))
+    prime_q = get_rsa_prime(path.join(path_primes, "prime_q.txt"))
+    key_mngmt = RSAKeysManager("key_rsa_default.txt", [prime_p, prime_q])
     print("\nClé publique :")
     print(key_mngmt.get_public_key())
     print("Clé privée :")
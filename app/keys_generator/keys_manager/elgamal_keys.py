@@ -3,7 +3,7 @@ from os import path
 from app.keys_generator.keys_manager.keys_manager import KeysManager
 from app.keys_generator.xorshift import XORShift
 from app.utils.file_manager import read_file, write_file
-from app.utils.modular_arithmetic import square_and_multiply
+from app.utils.modular_arithmetic import square_and_multiply, fixed_base
 
 path_data = path.join(path.abspath(path.dirname(__file__)), '../../../data/')
 path_keys = path.join(path_data, 'keys/')
@@ -40,7 +40,7 @@ class ElGamalKeysManager(KeysManager):
             # Generate new keys
             xorshift = XORShift()
             self.__private_key = xorshift.getrandbits(512)
-            self.__public_key = square_and_multiply(generator, self.__private_key, prime)
+            self.__public_key = fixed_base(generator, prime).power(self.__private_key)
 
             # Write new keys to files
             write_file(path.join(path_private, keys_filename), 'ElGamal\n' + str(self.__private_key))
@@ -10,13 +10,32 @@ path_keys = path.join(path_data, 'keys/')
 path_public = path.join(path_keys, 'public/')
 path_private = path.join(path_keys, 'private/')
 
+# Public exponent of the generated keys
+DEFAULT_PUBLIC_EXPONENT = 65537
+
+
+def is_valid_rsa_prime(prime: int, public_exponent: int) -> bool:
+    """
+    Tells if the prime can be used to generate RSA keys with the public exponent (gcd(e, prime - 1) = 1)
+    :param prime:
+    :param public_exponent:
+    :return:
+    """
+    return gcd(prime - 1, public_exponent) == 1
+
 
 class RSAKeysManager(KeysManager):
     """
     Manages RSA public / private key pair
     """
 
-    def __init__(self, keys_filename: str, prime_couple: list = None):
+    def __init__(self, keys_filename: str, prime_couple: list = None, public_exponent: int = DEFAULT_PUBLIC_EXPONENT):
+        """
+        :param keys_filename: File of the keys, generated if it does not exist
+        :param prime_couple: The primes p and q used to generate the keys
+        :param public_exponent: Public exponent e of the generated keys, a small e makes the verifications fast (only
+        17 modular multiplications for 65537). If None, e is chosen randomly
+        """
 
         if path.exists(path.join(path_public, keys_filename)) and path.exists(path.join(path_private, keys_filename)):
             public = read_file(path.join(path_public, keys_filename)).splitlines()
@@ -25,7 +44,10 @@ class RSAKeysManager(KeysManager):
             self.__e = int(public[1])
             self.__n = int(public[2])
 
-            self.__d = int(read_file(path.join(path_private, keys_filename)).splitlines()[1])
+            private = read_file(path.join(path_private, keys_filename)).splitlines()
+            self.__d = int(private[1])
+            # The previous key files only contain d, the signatures are then computed without the CRT
+            self.__crt = [int(value) for value in private[2:7]] if len(private) >= 7 else None
         else:
             if prime_couple is None:
                 raise Exception(
@@ -37,18 +59,29 @@ class RSAKeysManager(KeysManager):
             # Euler's totient function
             phi_n = (p - 1) * (q - 1)
 
-            # Find e coprime with phi(n)
-            while True:
-                self.__e = random.randint(2, phi_n)
-                if gcd(self.__e, phi_n) == 1:
-                    break
+            if public_exponent is None:
+                # Find e coprime with phi(n)
+                while True:
+                    self.__e = random.randint(2, phi_n)
+                    if gcd(self.__e, phi_n) == 1:
+                        break
+            else:
+                # e must be coprime with p - 1 and q - 1, always true for safe primes greater than 2e + 1
+                if not is_valid_rsa_prime(p, public_exponent) or not is_valid_rsa_prime(q, public_exponent):
+                    raise ValueError("L'exposant public " + str(public_exponent) + " n'est pas premier avec p - 1 et "
+                                     "q - 1. Impossible de générer un couple de clés publique / privée!")
+                self.__e = public_exponent
 
             # Calculate the inverse of e in phi(n) such as e*d = 1 mod(phi(n))
             self.__d = inverse(self.__e, phi_n)
             # print((self.__e * self.__d) % phi_n)
 
+            # Parameters of the Chinese remainder theorem: p, q, d mod (p - 1), d mod (q - 1), inverse of q mod p
+            self.__crt = [p, q, self.__d % (p - 1), self.__d % (q - 1), inverse(q, p)]
+
             # Write new keys to file
-            write_file(path.join(path_private, keys_filename), 'RSA\n' + str(self.__d))
+            write_file(path.join(path_private, keys_filename), 'RSA\n' + str(self.__d) + '\n' +
+                       '\n'.join(str(value) for value in self.__crt))
             write_file(path.join(path_public, keys_filename), 'RSA\n' +
                        str(self.__e) + '\n' +
                        str(self.__n))
@@ -61,3 +94,10 @@ class RSAKeysManager(KeysManager):
 
     def get_private_key(self):
         return self.__d
+
+    def get_crt_parameters(self):
+        """
+        Gives the private parameters used to sign with the Chinese remainder theorem
+        :return: [p, q, dP, dQ, qInv] or None for the keys stored without them
+        """
+        return self.__crt
@@ -1,17 +1,40 @@
 from os import path
+import multiprocessing
+import os
+import queue
 import random
+import time
 from app.keys_generator.xorshift import XORShift
 from app.utils.file_manager import read_file, write_file
-from app.utils.modular_arithmetic import square_and_multiply
 
 
-def _generate_possible_prime(n_bits: int = 128) -> int:
+def _sieve_of_eratosthenes(limit: int) -> list:
+    """
+    Gives all the primes lower than limit
+    :param limit:
+    :return: The sorted list of primes
+    """
+    is_prime = bytearray([1]) * limit
+    is_prime[0:2] = b'\x00\x00'
+    for i in range(2, int(limit ** 0.5) + 1):
+        if is_prime[i]:
+            is_prime[i * i::i] = bytes(len(range(i * i, limit, i)))
+
+    return [i for i in range(limit) if is_prime[i]]
+
+
+# Odd primes used to discard candidates with cheap modular checks (the first 2048 odd primes)
+_small_primes = _sieve_of_eratosthenes(17900)[1:2049]
+
+
+def _generate_possible_prime(n_bits: int = 128, xorshift: XORShift = None) -> int:
     """
     Generate an odd random number of n_bits bits
     :param n_bits: Number of bits of the random number
+    :param xorshift: Random generator to use (a new one if not given)
     :return:
     """
-    xorshift = XORShift()
+    xorshift = xorshift or XORShift()
     possible_prime = xorshift.getrandbits(n_bits)
 
     # Make sure it is at least of the size n_bits bits
@@ -23,13 +46,40 @@ def _generate_possible_prime(n_bits: int = 128) -> int:
     return possible_prime
 
 
-def _check_is_prime(possible_prime: int, test_rounds: int = 40) -> bool:
+def _miller_rabin_rounds(n_bits: int) -> int:
+    """
+    Number of Miller-Rabin rounds with random bases for a random candidate of n_bits bits, giving an error probability
+    lower than 2^-80 (Handbook of Applied Cryptography, table 4.4, the same bounds are used by OpenSSL)
+    :param n_bits: Number of bits of the candidate
+    :return:
+    """
+    for min_bits, rounds in ((1300, 2), (850, 3), (650, 4), (550, 5), (450, 6), (400, 7), (350, 8), (300, 9),
+                             (250, 12), (200, 15), (150, 18), (100, 27)):
+        if n_bits >= min_bits:
+            return rounds
+
+    return 40
+
+
+def _check_is_prime(possible_prime: int, test_rounds: int = None) -> bool:
     """
     Checks if the given number is a prime with Miller-Rabin test
     :param possible_prime: The number to check
-    :param test_rounds: Number of test rounds for Miller-Rabin, it is the accuracy level. Internet says it should be 40
+    :param test_rounds: Number of test rounds for Miller-Rabin with random bases, it is the accuracy level (depends on
+    the size of the number if not given, see _miller_rabin_rounds)
     :return: True if prime
     """
+    if possible_prime < 2:
+        return False
+
+    # Trial division by the first small primes
+    for small_prime in _small_primes[:64]:
+        if possible_prime % small_prime == 0:
+            return possible_prime == small_prime
+    if possible_prime & 1 == 0:
+        return possible_prime == 2
+    if possible_prime < _small_primes[63] ** 2:
+        return True
 
     # 2^s * d = n - 1
     d = possible_prime - 1
@@ -38,29 +88,39 @@ def _check_is_prime(possible_prime: int, test_rounds: int = 40) -> bool:
         s += 1
         d >>= 1  # division by 2 of even number
 
+    # Cheap strong probable prime test in base 2 first, most composites fail it
+    if not _miller_rabin_test(possible_prime, d, s, 2):
+        return False
+
+    if test_rounds is None:
+        test_rounds = _miller_rabin_rounds(possible_prime.bit_length())
+
     for i in range(test_rounds):
-        if not _miller_rabin_test(possible_prime, d):
+        if not _miller_rabin_test(possible_prime, d, s):
             return False
 
     return True
 
 
-def _miller_rabin_test(possible_prime: int, d: int) -> bool:
+def _miller_rabin_test(possible_prime: int, d: int, s: int, a: int = None) -> bool:
     """
     Performs a Rabin-Miller test on a possible prime
-    :param d: As 2^s * d = n - 1
     :param possible_prime:
+    :param d: As 2^s * d = n - 1
+    :param s: As 2^s * d = n - 1
+    :param a: Base of the test (random if not given)
     :return: True if possible prime, else false
     """
-    a = random.randint(2, possible_prime - 2)
-    adn = square_and_multiply(a, d, possible_prime)
+    if a is None:
+        a = random.randint(2, possible_prime - 2)
+
+    adn = pow(a, d, possible_prime)
 
     if adn == 1 or adn == possible_prime - 1:
         return True
 
-    while d != possible_prime - 1:
-        adn = square_and_multiply(adn, 2, possible_prime)
-        d *= 2
+    for i in range(s - 1):
+        adn = pow(adn, 2, possible_prime)
 
         if adn == 1:
             return False
@@ -71,34 +131,164 @@ def _miller_rabin_test(possible_prime: int, d: int) -> bool:
     return False
 
 
-def get_prime(n_bits: int) -> int:
+def _is_base_2_probable_prime(possible_prime: int) -> bool:
+    """
+    Fermat test in base 2, cheap filter for the candidates without small factors
+    :param possible_prime: Odd number
+    :return: False if the number is composite
+    """
+    return pow(2, possible_prime - 1, possible_prime) == 1
+
+
+def _sieve_safe_prime_candidates(start: int, window: int, max_small_prime: int) -> list:
+    """
+    Sieves the window of candidates start, start + 4, ..., start + 4 * (window - 1) with the small primes. A candidate p
+    is discarded if a small prime r divides p (p = 0 mod r) or divides q = (p - 1) / 2 (p = 1 mod r)
+    :param start: First candidate (3 mod 4 so that q is odd)
+    :param window: Number of candidates
+    :param max_small_prime: Only the small primes lower than this bound are used (they must be lower than q)
+    :return: The remaining candidates, in order
+    """
+    sieve = bytearray([1]) * window
+    for small_prime in _small_primes:
+        if small_prime >= max_small_prime:
+            break
+
+        # Index k of the first candidate start + 4k equal to residue modulo the small prime
+        inverse_4 = pow(4, small_prime - 2, small_prime)
+        for residue in (0, 1):
+            first_index = ((residue - start) * inverse_4) % small_prime
+            sieve[first_index::small_prime] = bytes(len(range(first_index, window, small_prime)))
+
+    return [start + 4 * k for k in range(window) if sieve[k]]
+
+
+def _search_safe_prime(n_bits: int, xorshift: XORShift = None, deadline: float = None) -> int:
+    """
+    Searches a safe prime of n_bits bits
+    :param n_bits: The number of bits of the safe prime
+    :param xorshift: Random generator of the candidates (a new one if not given)
+    :param deadline: Time (time.monotonic) after which the search is abandoned
+    :return: The safe prime, None if the deadline is reached
+    """
+    window = max(1024, 16 * n_bits)  # Number of candidates sieved at once
+    max_small_prime = 1 << max(0, n_bits - 2)  # q = (p - 1) / 2 is at least 2^(n_bits - 2)
+
+    while deadline is None or time.monotonic() < deadline:
+        # Random start of the window, congruent to 3 modulo 4
+        start = _generate_possible_prime(n_bits, xorshift) | 3
+
+        for prime in _sieve_safe_prime_candidates(start, window, max_small_prime):
+            if prime.bit_length() != n_bits:  # End of the window out of the n_bits numbers
+                break
+
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+
+            # Safe prime, q is tested before the full tests of p so that most candidates only cost two exponentiations
+            q = (prime - 1) >> 1
+            if _is_base_2_probable_prime(prime) and _is_base_2_probable_prime(q) and _check_is_prime(q) and \
+                    _check_is_prime(prime):
+                return prime
+
+    return None
+
+
+# Maximum time in seconds between two checks of the processes searching a safe prime
+_WORKERS_CHECK_INTERVAL = 1
+
+
+def _search_safe_prime_worker(n_bits: int, seed: int, results: multiprocessing.Queue):
+    """
+    Worker process of the parallel search, it has its own random state
+    :param n_bits: The number of bits of the safe prime
+    :param seed: Seed of the XORShift generator and of the random bases of Miller-Rabin
+    :param results: Queue in which the found safe prime is put
+    :return:
+    """
+    random.seed(seed)
+    results.put(_search_safe_prime(n_bits, XORShift(seed)))
+
+
+def get_prime(n_bits: int, workers: int = 1, timeout: float = None) -> int:
     """
     Creates a safe prime of n_bits bits
     :param n_bits: The number of bits of the generated safe prime
+    :param workers: Number of processes searching at the same time, the first safe prime found is returned
+    :param timeout: Maximum duration of the search in seconds (no limit if not given)
     :return: The generated safe prime
     """
-    prime = None
-    while True:
-        prime = _generate_possible_prime(n_bits)
-        if _check_is_prime(prime) and _check_is_prime((prime - 1) >> 1):  # Safe prime
-            break
+    if workers < 1:
+        raise ValueError('The number of processes must be at least 1 (' + str(workers) + ' given)')
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    if workers == 1:
+        prime = _search_safe_prime(n_bits, deadline=deadline)
+    else:
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=_search_safe_prime_worker,
+                                             args=(n_bits, int.from_bytes(os.urandom(16), 'big'), results),
+                                             daemon=True)
+                     for _ in range(workers)]
+        for process in processes:
+            process.start()
+
+        prime = None
+        try:
+            # The wait is bounded so that the workers are checked regularly, a dead worker never puts its result
+            while prime is None:
+                alive = any(process.is_alive() for process in processes)
+                wait = _WORKERS_CHECK_INTERVAL
+                if deadline is not None:
+                    wait = max(0, min(wait, deadline - time.monotonic()))
+                try:
+                    prime = results.get(timeout=wait)
+                except queue.Empty:
+                    if not alive:
+                        raise RuntimeError('All the processes searching a safe prime of ' + str(n_bits) +
+                                           ' bits stopped without result')
+                    if deadline is not None and time.monotonic() >= deadline:
+                        break
+        finally:
+            # The other workers are stopped as soon as a safe prime is found
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
+
+    if prime is None:
+        raise TimeoutError('No safe prime of ' + str(n_bits) + ' bits found in ' + str(timeout) + ' seconds')
 
     return prime
 
 
-def find_generator(prime: int) -> int:
+def _is_safe_prime_generator(generator: int, prime: int) -> bool:
     """
-    Finds a generator element to the given safe prime
-    :param prime:
+    Tells if generator generates the multiplicative group of the safe prime p = 2q + 1. The order of an element divides
+    2q so it is a generator unless its order is 1, 2 or q
+    :param generator:
+    :param prime: The safe prime
     :return:
     """
-    generator = 0
+    return pow(generator, 2, prime) != 1 and pow(generator, (prime - 1) >> 1, prime) != 1
+
+
+def find_generator(prime: int, max_small_generator: int = 1000) -> int:
+    """
+    Finds a generator element to the given safe prime, the smallest one if it is lower than max_small_generator (a small
+    generator makes the exponentiations faster). Half of the elements are generators so one is found after a few tries
+    :param prime: The safe prime
+    :param max_small_generator: Greatest small candidate tried before the random candidates
+    :return:
+    """
+    for generator in range(2, min(max_small_generator, prime - 2) + 1):
+        if _is_safe_prime_generator(generator, prime):
+            return generator
+
     while True:
         generator = random.randint(2, prime - 2)
-        if square_and_multiply(generator, (prime - 1) >> 1, prime) != 1:
-            break
-
-    return generator
+        if _is_safe_prime_generator(generator, prime):
+            return generator
 
 
 class Prime:
@@ -106,7 +296,17 @@ class Prime:
     Handles a prime and its generator
     """
 
-    def __init__(self, prime_path: path, n_bits: int = 512, with_generator: bool = True):
+    def __init__(self, prime_path: path, n_bits: int = 512, with_generator: bool = True, workers: int = 1,
+                 timeout: float = None, pool=None):
+        """
+        :param prime_path: File of the prime, generated if it does not exist
+        :param n_bits: Number of bits of the generated prime
+        :param with_generator: Finds a generator of the generated prime
+        :param workers: Number of processes searching the prime
+        :param timeout: Maximum duration of the prime search in seconds (TimeoutError)
+        :param pool: PrimePool from which the prime is taken if it has one of n_bits bits, or a function giving it
+                     (only called when the prime has to be generated)
+        """
         self.__generator = 0
 
         if path.exists(prime_path):
@@ -116,10 +316,19 @@ class Prime:
             if len(prime_lines) > 1:
                 self.__generator = int(prime_lines[1])
         else:
-            # Generate a new prime
-            self.__prime = get_prime(n_bits)
+            if callable(pool):
+                pool = pool()
+            pooled = pool.pop(n_bits) if pool is not None else None
+            if pooled is not None:
+                # Prime generated in advance
+                self.__prime, generator = pooled
+            else:
+                # Generate a new prime
+                self.__prime = get_prime(n_bits, workers, timeout)
+                generator = None
+
             if with_generator:
-                self.__generator = find_generator(self.__prime)
+                self.__generator = generator or find_generator(self.__prime)
                 write_file(prime_path, str(self.__prime) + '\n' + str(self.__generator))
             else:
                 write_file(prime_path, str(self.__prime))
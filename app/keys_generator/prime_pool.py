@@ -0,0 +1,191 @@
+import os
+import threading
+import time
+from os import path
+
+from app.keys_generator.prime import get_prime, find_generator
+from app.utils.file_manager import read_file
+
+path_pool = path.join(path.abspath(path.dirname(__file__)), '../../data/primes/pool/')
+
+
+class PrimePool:
+    """
+    Reserve of safe primes (with a generator) generated in advance and stored on disk, one file per prime in a
+    directory per size. A background thread refills the reserve when its depth goes under the low watermark
+    """
+
+    def __init__(self, pool_dir: path = path_pool, sizes: tuple = (512,), low_watermark: int = 2,
+                 high_watermark: int = 4, workers: int = 1, refill_interval: float = 60):
+        """
+        :param pool_dir: Directory of the reserve
+        :param sizes: Number of bits of the primes kept in the reserve
+        :param low_watermark: The reserve of a size is refilled when it has less primes
+        :param high_watermark: Number of primes of each size after a refill
+        :param workers: Number of processes used to generate a prime
+        :param refill_interval: Maximum time in seconds between two checks of the background thread
+        """
+        self.pool_dir = pool_dir
+        self.sizes = sizes
+        self.low_watermark = low_watermark
+        self.high_watermark = max(low_watermark, high_watermark)
+        self.workers = workers
+        self.refill_interval = refill_interval
+
+        # Metrics
+        self.hits = 0  # Primes taken from the reserve
+        self.misses = 0  # Primes asked when the reserve was empty
+        self.generated = 0  # Primes added to the reserve
+        self.__metrics_lock = threading.Lock()  # The counters are changed by the background thread too
+
+        self.__refill_needed = threading.Event()
+        self.__stop = threading.Event()
+        self.__thread = None
+
+        for n_bits in sizes:
+            os.makedirs(self.__size_dir(n_bits), exist_ok=True)
+
+    def __size_dir(self, n_bits: int) -> path:
+        """
+        Gives the directory of the primes of n_bits bits
+        :param n_bits:
+        :return:
+        """
+        return path.join(self.pool_dir, str(n_bits))
+
+    def __prime_files(self, n_bits: int) -> list:
+        """
+        Lists the files of the primes of n_bits bits available in the reserve, the oldest first
+        :param n_bits:
+        :return:
+        """
+        size_dir = self.__size_dir(n_bits)
+        if not path.isdir(size_dir):
+            return []
+
+        return sorted(filename for filename in os.listdir(size_dir) if filename.endswith('.txt'))
+
+    def depth(self, n_bits: int) -> int:
+        """
+        Gives the number of primes of n_bits bits in the reserve
+        :param n_bits:
+        :return:
+        """
+        return len(self.__prime_files(n_bits))
+
+    def metrics(self) -> dict:
+        """
+        Gives the depth of the reserve for every size and the counters of the pool
+        :return:
+        """
+        depth = {n_bits: self.depth(n_bits) for n_bits in self.sizes}
+        with self.__metrics_lock:
+            return {
+                'depth': depth,
+                'hits': self.hits,
+                'misses': self.misses,
+                'generated': self.generated,
+            }
+
+    def push(self, n_bits: int, prime: int, generator: int):
+        """
+        Adds a prime to the reserve, the file is written under a temporary name and then renamed so that it is never
+        read incomplete
+        :param n_bits: Number of bits of the prime
+        :param prime: The safe prime
+        :param generator: A generator of the prime
+        :return:
+        """
+        size_dir = self.__size_dir(n_bits)
+        os.makedirs(size_dir, exist_ok=True)
+
+        filename = str(time.time_ns()) + '-' + str(os.getpid()) + '-' + os.urandom(4).hex()
+        tmp_path = path.join(size_dir, filename + '.tmp')
+        with open(tmp_path, 'w') as file:
+            file.write(str(prime) + '\n' + str(generator))
+        os.replace(tmp_path, path.join(size_dir, filename + '.txt'))
+
+        with self.__metrics_lock:
+            self.generated += 1
+
+    def pop(self, n_bits: int) -> (int, int):
+        """
+        Takes a prime from the reserve. The file is claimed by renaming it, so a prime is never given twice even if
+        several processes use the reserve
+        :param n_bits: Number of bits of the prime
+        :return: The safe prime and its generator, None if the reserve is empty
+        """
+        result = None
+        size_dir = self.__size_dir(n_bits)
+        for filename in self.__prime_files(n_bits):
+            claimed_path = path.join(size_dir, filename + '.claimed')
+            try:
+                os.rename(path.join(size_dir, filename), claimed_path)
+            except OSError:  # Taken by another process
+                continue
+
+            prime_lines = read_file(claimed_path).splitlines()
+            os.remove(claimed_path)
+            result = int(prime_lines[0]), int(prime_lines[1])
+            break
+
+        with self.__metrics_lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if self.depth(n_bits) < self.low_watermark:
+            self.__refill_needed.set()  # Wakes up the background thread
+
+        return result
+
+    def refill(self, n_bits: int = None):
+        """
+        Generates primes until the reserve reaches the high watermark
+        :param n_bits: Size to refill (all the sizes if not given)
+        :return:
+        """
+        for size in ([n_bits] if n_bits is not None else self.sizes):
+            while self.depth(size) < self.high_watermark and not self.__stop.is_set():
+                prime = get_prime(size, self.workers)
+                self.push(size, prime, find_generator(prime))
+
+    def start(self):
+        """
+        Starts the background thread refilling the reserve
+        :return:
+        """
+        if self.__thread is not None and self.__thread.is_alive():
+            return
+
+        self.__stop.clear()
+        self.__refill_needed.set()  # First check right away
+        self.__thread = threading.Thread(target=self.__run, name='prime-pool', daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """
+        Stops the background thread (after the prime being generated)
+        :return:
+        """
+        self.__stop.set()
+        self.__refill_needed.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def __run(self):
+        """
+        Background thread: refills the sizes under the low watermark when a prime is taken or periodically
+        :return:
+        """
+        while not self.__stop.is_set():
+            self.__refill_needed.wait(self.refill_interval)
+            self.__refill_needed.clear()
+
+            for n_bits in self.sizes:
+                if self.__stop.is_set():
+                    break
+                if self.depth(n_bits) < self.low_watermark:
+                    self.refill(n_bits)
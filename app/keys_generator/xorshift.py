@@ -7,14 +7,28 @@ class XORShift:
     XORShift 128 bits vanilla implementation
     """
 
-    def __init__(self):
-        # Probably not the most secure way to initialize the state but it works
-        self.a = random.getrandbits(32)
-        self.b = random.getrandbits(32)
-        self.c = random.getrandbits(32)
-        self.d = random.getrandbits(32)
+    def __init__(self, seed: int = None):
+        """
+        :param seed: 128-bit seed of the state (random if not given), two generators with the same seed give the same
+        numbers
+        """
         self.mask_32bits = mask = (1 << 32) - 1
 
+        if seed is None:
+            # Probably not the most secure way to initialize the state but it works
+            self.a = random.getrandbits(32)
+            self.b = random.getrandbits(32)
+            self.c = random.getrandbits(32)
+            self.d = random.getrandbits(32)
+        else:
+            self.a = (seed >> 96) & mask
+            self.b = (seed >> 64) & mask
+            self.c = (seed >> 32) & mask
+            self.d = seed & mask
+
+        if self.a == self.b == self.c == self.d == 0:  # XORShift can not leave the null state
+            self.d = 1
+
     def _generate(self) -> int:
         """
         Generate 32 random bits from xorshift
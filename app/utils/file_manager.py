@@ -67,3 +67,72 @@ def file_loader(text: str, default_file: str, dir_path: path) -> (str, str, bool
 
     print('Fichier ', filename, ' chargé!')
     return loaded_text, filename, False
+
+
+def file_selector(text: str, default_file: str, dir_path: path) -> (path, str, bool):
+    """
+    Asks for an existing file without loading it (for the files processed by chunks)
+    :param text: Text outputted to the user
+    :param default_file: Default file to select if none is given
+    :param dir_path: The directory in which the file is
+    :return: The path of the file, the filename and a boolean to quit
+    """
+    while True:
+        print(text)
+        filename = input()
+        if filename == 'q':
+            return '', '', True
+
+        if len(filename) == 0:
+            filename = default_file
+
+        path_file = path.join(dir_path, filename)
+
+        if path.isfile(path_file) and path.getsize(path_file) != 0:
+            break
+
+        print('Erreur dans la lecture du fichier')
+
+    print('Fichier ', filename, ' sélectionné!')
+    return path_file, filename, False
+
+
+class HexWriter:
+    """
+    Writes bytes into a text file as an hexadecimal string
+    """
+
+    def __init__(self, file):
+        """
+        :param file: Text file opened for writing
+        """
+        self.file = file
+
+    def write(self, data: bytes) -> int:
+        return self.file.write(bytes(data).hex())
+
+
+class HexReader:
+    """
+    Reads bytes from a text file containing an hexadecimal string (whitespaces are ignored)
+    """
+
+    def __init__(self, file):
+        """
+        :param file: Text file opened for reading
+        """
+        self.file = file
+        self.pending = ''  # Odd hexadecimal digit waiting for the next read
+
+    def read(self, size: int) -> bytes:
+        digits = self.pending
+        while len(digits) < 2 * size:
+            text = self.file.read(2 * size - len(digits))
+            if not text:
+                break
+            digits += ''.join(text.split())
+
+        nb_digits = len(digits) - len(digits) % 2
+        self.pending = digits[nb_digits:]
+
+        return bytes.fromhex(digits[:nb_digits])
@@ -1,4 +1,5 @@
 from collections import Counter
+from functools import lru_cache
 
 
 def prime_decomposition(n: int) -> (list, list):
@@ -50,6 +51,119 @@ def square_and_multiply(a: int, power: int, modulo: int) -> int:
     return result
 
 
+class FixedBaseExponentiation:
+    """
+    Exponentiation of a fixed base (a generator) with precomputed tables: the exponent is cut into windows of w bits
+    and the table of the i-th window contains base^(j * 2^(w * i)) for every digit j, so base^power is the product of
+    one table element per window (no squaring). The tables are computed when a longer exponent needs them
+    """
+
+    def __init__(self, base: int, modulo: int, window: int = 6):
+        """
+        :param base: The fixed base
+        :param modulo:
+        :param window: Number of bits of the windows (a table has 2^window elements)
+        """
+        self.base = base % modulo
+        self.modulo = modulo
+        self.window = window
+        self.__mask = (1 << window) - 1
+        self.__tables = []
+        self.__next_base = self.base  # base^(2^(window * len(tables))), first element of the next table
+
+    def __extend(self, n_bits: int):
+        """
+        Computes the tables up to exponents of n_bits bits
+        :param n_bits:
+        :return:
+        """
+        modulo = self.modulo
+        while len(self.__tables) * self.window < n_bits:
+            window_base = self.__next_base
+            table = [1, window_base]
+            for _ in range(2, self.__mask + 1):
+                table.append(table[-1] * window_base % modulo)
+
+            self.__tables.append(table)
+            self.__next_base = table[-1] * window_base % modulo
+
+    def power(self, power: int) -> int:
+        """
+        Gives base^power mod modulo
+        :param power: Positive exponent
+        :return:
+        """
+        if power < 0:
+            raise Exception('Negative exponent')
+
+        self.__extend(power.bit_length())
+
+        modulo = self.modulo
+        mask = self.__mask
+        window = self.window
+        result = 1
+        for table in self.__tables:
+            if not power:
+                break
+            digit = power & mask
+            if digit:
+                result = result * table[digit] % modulo
+            power >>= window
+
+        return result % modulo
+
+
+@lru_cache(maxsize=4)
+def fixed_base(base: int, modulo: int) -> FixedBaseExponentiation:
+    """
+    Gives the precomputed exponentiation of the base, shared by all the exponentiations of the same (base, modulo).
+    The tables grow to 2^window numbers of the size of the modulo for every window of the exponents (about 0.5 MB for
+    a 512-bit modulo and 6 MB for a 2048-bit one), so only the last 4 are kept
+    :param base: The fixed base (a generator)
+    :param modulo:
+    :return:
+    """
+    return FixedBaseExponentiation(base, modulo)
+
+
+def multi_exponentiation(bases: list, powers: list, modulo: int, window: int = None) -> int:
+    """
+    Product of several exponentiations (Straus / Shamir trick): the exponents are read together window by window so
+    the squarings are shared by all the bases instead of being done for every exponentiation
+    :param bases:
+    :param powers: Positive exponent of every base
+    :param modulo:
+    :param window: Number of bits of the windows (chosen from the size of the modulo if not given)
+    :return: The product of base^power mod modulo
+    """
+    if window is None:
+        window = 5 if modulo.bit_length() <= 1024 else 6
+    mask = (1 << window) - 1
+
+    # Table of base^j for every digit j of a window
+    tables = []
+    for base in bases:
+        base %= modulo
+        table = [1, base]
+        for _ in range(2, mask + 1):
+            table.append(table[-1] * base % modulo)
+        tables.append(table)
+
+    n_windows = (max(power.bit_length() for power in powers) + window - 1) // window
+    result = 1
+    for shift in range(window * (n_windows - 1), -1, -window):
+        if result != 1:
+            for _ in range(window):
+                result = result * result % modulo
+
+        for table, power in zip(tables, powers):
+            digit = (power >> shift) & mask
+            if digit:
+                result = result * table[digit] % modulo
+
+    return result % modulo
+
+
 def products(el: list) -> list:
     """
     Generates all possible multiplication combinations of given numbers
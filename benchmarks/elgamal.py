@@ -0,0 +1,100 @@
+"""
+Compares the exponentiations of the ElGamal generator (square and multiply, built-in pow and fixed-base tables) and the
+signature verifications (three exponentiations or the multi-exponentiation)
+Usage (from the root of the project): python -m benchmarks.elgamal [--exponentiations N] [--verifications N]
+"""
+import argparse
+import random
+import time
+from os import path
+
+from app.blockchain.signature.elgamal import ElGamalSignature
+from app.hashes.hash.sponge_hash import SpongeHash
+from app.keys_generator.prime import Prime
+from app.utils.modular_arithmetic import FixedBaseExponentiation, square_and_multiply, gcd, inverse
+from benchmarks.timing import rate
+
+# 2048-bit MODP group of the RFC 3526 (generator 2)
+MODP_2048 = int('FFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD129024E088A67CC74020BBEA63B139B22514A08798E3404DD'
+                'EF9519B3CD3A431B302B0A6DF25F14374FE1356D6D51C245E485B576625E7EC6F44C42E9A637ED6B0BFF5CB6F406B7ED'
+                'EE386BFB5A899FA5AE9F24117C4B1FE649286651ECE45B3DC2007CB8A163BF0598DA48361C55D39A69163FA8FD24CF5F'
+                '83655D23DCA3AD961C62F356208552BB9ED529077096966D670C354E4ABC9804F1746C08CA18217C32905E462E36CE3B'
+                'E39E772C180E86039B2783A2EC07A28FB5C55DF06F4C52C9DE2BCBF6955817183995497CEA956AE515D2261898FA0510'
+                '15728E5A8AACAA68FFFFFFFFFFFFFFFF', 16)
+
+
+def _groups() -> list:
+    """
+    Gives the groups of the benchmark
+    :return: List of (name, prime, generator)
+    """
+    default = Prime(path.join(path.dirname(path.abspath(__file__)), '../data/primes/prime_default.txt'))
+
+    return [('512 bits', default.get_prime(), default.get_generator()), ('2048 bits (RFC 3526)', MODP_2048, 2)]
+
+
+def _sign(message: str, private_key: int, prime: int, generator: int) -> list:
+    """
+    ElGamal signature without keys file (same computation as ElGamalSignature.sign)
+    """
+    h_digest = SpongeHash().hash(message, False)
+    while True:
+        y = random.randint(1, prime - 2)
+        if gcd(y, prime - 1) == 1:
+            break
+
+    s1 = pow(generator, y, prime)
+    s2 = (inverse(y, prime - 1) * (h_digest - private_key * s1)) % (prime - 1)
+
+    return [hex(s1).lstrip('0x'), hex(s2).lstrip('0x')]
+
+
+def _legacy_verify(message: str, signature: list, public_key: list) -> bool:
+    """
+    Previous verification with three square and multiply, kept for comparison
+    """
+    public, prime, generator = public_key
+    s1 = int(signature[0], 16)
+    s2 = int(signature[1], 16)
+    h_digest = SpongeHash().hash(message, False)
+
+    check1 = (square_and_multiply(public, s1, prime) * square_and_multiply(s1, s2, prime)) % prime
+
+    return check1 == square_and_multiply(generator, h_digest, prime)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ElGamal exponentiations throughput')
+    parser.add_argument('--exponentiations', type=int, default=50, help='Number of exponentiations of each method')
+    parser.add_argument('--verifications', type=int, default=20, help='Number of signatures verified by each method')
+    args = parser.parse_args()
+
+    for name, prime, generator in _groups():
+        exponents = [(random.randrange(1, prime - 1),) for _ in range(args.exponentiations)]
+        fixed = FixedBaseExponentiation(generator, prime)
+        start = time.perf_counter()
+        fixed.power(prime - 2)  # Computes all the tables
+        print('Group of', name + ', tables computed in {:.1f} ms'.format((time.perf_counter() - start) * 1000))
+
+        print('Method              g^x/s')
+        for method, function in [('square and multiply', lambda x: square_and_multiply(generator, x, prime)),
+                                 ('pow', lambda x: pow(generator, x, prime)),
+                                 ('fixed base', fixed.power)]:
+            print('{:<19} {:>6.1f}'.format(method, rate(function, exponents)))
+
+        private_key = random.randrange(1, prime - 1)
+        public_key = [pow(generator, private_key, prime), prime, generator]
+        signed = []
+        for i in range(args.verifications):
+            message = 'Transaction ' + str(i)
+            signed.append((message, _sign(message, private_key, prime, generator), public_key))
+
+        print('\nVerification        verifications/s')
+        # The current verification uses the multi-exponentiation and the fixed-base tables of the generator
+        for method, function in [('previous', _legacy_verify), ('current', ElGamalSignature.verify)]:
+            print('{:<19} {:>16.1f}'.format(method, rate(function, signed)))
+        print()
+
+
+if __name__ == '__main__':
+    main()
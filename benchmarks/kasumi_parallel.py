@@ -0,0 +1,54 @@
+"""
+Compares the serial and the parallel implementations of the KASUMI cipher modes
+Usage (from the root of the project): python -m benchmarks.kasumi_parallel [--size MB] [--workers N]
+"""
+import argparse
+import os
+
+from app.kasumi.cipher_mode.cbc import CBC
+from app.kasumi.cipher_mode.cfb import CFB
+from app.kasumi.cipher_mode.ctr import CTR
+from app.kasumi.cipher_mode.ecb import ECB
+from app.kasumi.kasumi import Kasumi
+from benchmarks.timing import timed
+
+KEY = '0x9900aabbccddeeff1122334455667788'
+IV = '0x90abcdef12345678'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serial versus parallel KASUMI cipher modes')
+    parser.add_argument('--size', type=float, default=1, help='Size of the message in MB')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Number of processes')
+    parser.add_argument('--chunk-size', type=int, default=4096, help='Number of blocks per chunk')
+    args = parser.parse_args()
+
+    message = os.urandom(int(args.size * 1024 * 1024))
+    kasumi = Kasumi()
+    print('Message of', len(message), 'bytes,', args.workers, 'workers, chunks of', args.chunk_size, 'blocks\n')
+    print('Operation         Serial (MB/s)   Parallel (MB/s)   Speedup')
+
+    for cipher_mode, operation in [(ECB, 'encrypt'), (CTR, 'encrypt'), (ECB, 'decrypt'), (CBC, 'decrypt'),
+                                   (CFB, 'decrypt')]:
+        serial = cipher_mode(kasumi)
+        parallel = cipher_mode(kasumi, workers=args.workers, chunk_size=args.chunk_size)
+
+        if operation == 'encrypt':
+            serial_result, serial_time = timed(serial.encrypt_bytes, message, KEY, IV)
+            parallel_result, parallel_time = timed(parallel.encrypt_bytes, message, KEY, IV)
+        else:
+            encrypted = serial.encrypt_bytes(message, KEY, IV)
+            serial_result, serial_time = timed(serial.decrypt_bytes, encrypted, KEY, IV, len(message))
+            parallel_result, parallel_time = timed(parallel.decrypt_bytes, encrypted, KEY, IV, len(message))
+
+        if serial_result != parallel_result:
+            print('Error: serial and parallel', cipher_mode.__name__, operation, 'results differ')
+
+        size_mb = len(message) / (1024 * 1024)
+        print('{:<17} {:>13.3f}   {:>15.3f}   {:>6.2f}x'.format(cipher_mode.__name__ + ' ' + operation,
+                                                               size_mb / serial_time, size_mb / parallel_time,
+                                                               serial_time / parallel_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Compares the previous primality test (square and multiply, 40 Miller-Rabin rounds) with the current one (built-in pow,
+base 2 test first, number of rounds depending on the size)
+Usage (from the root of the project): python -m benchmarks.prime [--bits N] [--candidates N]
+"""
+import argparse
+import random
+
+from app.keys_generator.prime import _check_is_prime, get_prime
+from app.utils.modular_arithmetic import square_and_multiply
+from benchmarks.timing import rate
+
+
+def _legacy_check_is_prime(possible_prime: int, test_rounds: int = 40) -> bool:
+    """
+    Previous Miller-Rabin test, kept for comparison
+    """
+    d = possible_prime - 1
+    while (d & 1) == 0:
+        d >>= 1
+
+    for i in range(test_rounds):
+        a = random.randint(2, possible_prime - 2)
+        adn = square_and_multiply(a, d, possible_prime)
+        if adn == 1 or adn == possible_prime - 1:
+            continue
+
+        round_d = d
+        while round_d != possible_prime - 1:
+            adn = square_and_multiply(adn, 2, possible_prime)
+            round_d *= 2
+            if adn == 1 or adn == possible_prime - 1:
+                break
+
+        if adn != possible_prime - 1:
+            return False
+
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Primality test throughput')
+    parser.add_argument('--bits', type=int, default=512, help='Size of the numbers in bits')
+    parser.add_argument('--candidates', type=int, default=200, help='Number of random odd candidates')
+    args = parser.parse_args()
+
+    candidates = [(random.getrandbits(args.bits) | (1 << (args.bits - 1)) | 1,) for _ in range(args.candidates)]
+    primes = [(get_prime(args.bits),) for _ in range(3)]
+    print('Numbers of', args.bits, 'bits\n')
+    print('Test       Random candidates/s   Primes/s')
+
+    for name, function in [('previous', _legacy_check_is_prime), ('current', _check_is_prime)]:
+        print('{:<10} {:>19.1f}   {:>8.2f}'.format(name, rate(function, candidates), rate(function, primes)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Compares the RSA signatures over the full modulus (square and multiply, built-in pow) with the signatures computed with
+the Chinese remainder theorem, the verifications with a random public exponent and with 65537, and the batch
+verification in a pool of processes
+Usage (from the root of the project):
+python -m benchmarks.rsa [--bits N] [--signatures N] [--verifications N] [--workers N]
+"""
+import argparse
+import os
+import random
+
+from app.blockchain.signature.rsa import RSASignature
+from app.hashes.hash.sponge_hash import SpongeHash
+from app.keys_generator.keys_manager.rsa_keys import is_valid_rsa_prime
+from app.keys_generator.prime import get_prime
+from app.utils.modular_arithmetic import gcd, inverse, square_and_multiply
+from benchmarks.timing import rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description='RSA signatures throughput')
+    parser.add_argument('--bits', type=int, default=512, help='Size of p and q in bits')
+    parser.add_argument('--signatures', type=int, default=200, help='Number of signatures of each method')
+    parser.add_argument('--verifications', type=int, default=200, help='Number of verifications of each method')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='Number of processes of the batch verification')
+    args = parser.parse_args()
+
+    p = get_prime(args.bits)
+    q = get_prime(args.bits)
+    if not is_valid_rsa_prime(p, 65537) or not is_valid_rsa_prime(q, 65537):
+        raise Exception('65537 is not coprime with p - 1 and q - 1')
+    n = p * q
+    phi_n = (p - 1) * (q - 1)
+    while True:
+        e = random.randint(2, phi_n)
+        if gcd(e, phi_n) == 1:
+            break
+    d = inverse(e, phi_n)
+    crt = [p, q, d % (p - 1), d % (q - 1), inverse(q, p)]
+
+    digests = [(random.getrandbits(512),) for _ in range(args.signatures)]
+    print('Modulus of', n.bit_length(), 'bits\n')
+    print('Method               signatures/s')
+    for method, function in [('square and multiply', lambda h: square_and_multiply(h, d, n)),
+                             ('pow', lambda h: pow(h, d, n)),
+                             ('CRT', lambda h: RSASignature.sign_crt(h, *crt))]:
+        print('{:<20} {:>13.1f}'.format(method, rate(function, digests)))
+
+    # Verifications of signed messages with a random e (previous keys) and with e = 65537
+    print('\nPublic exponent      verifications/s')
+    for name, public_exponent in [('random', e), ('65537', 65537)]:
+        private_exponent = inverse(public_exponent, phi_n)
+        signed = []
+        for i in range(args.verifications):
+            message = 'Transaction ' + str(i)
+            signature = hex(pow(SpongeHash().hash(message, to_hex=False), private_exponent, n)).lstrip('0x')
+            signed.append((message, signature, [public_exponent, n]))
+        print('{:<20} {:>16.1f}'.format(name, rate(RSASignature.verify, signed)))
+
+    # signed contains the signatures of the last public exponent (65537)
+    print('\nBatch verification   verifications/s')
+    for method, workers in [('serial', 1), (str(args.workers) + ' processes', args.workers)]:
+        print('{:<20} {:>16.1f}'.format(method, rate(RSASignature.verify_batch, [(signed, workers)]) * len(signed)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""
+Compares the SHA-256 compression functions (readable reference and fast kernel) with hashlib
+Usage (from the root of the project): python -m benchmarks.sha256 [--size MB]
+"""
+import argparse
+import hashlib
+import os
+
+from app.hashes.hash.sha256 import SHA256
+from benchmarks.timing import timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SHA-256 throughput')
+    parser.add_argument('--size', type=float, default=1, help='Size of the message in MB')
+    args = parser.parse_args()
+
+    message = os.urandom(int(args.size * 1024 * 1024))
+    size_mb = len(message) / (1024 * 1024)
+    print('Message of', len(message), 'bytes\n')
+    print('Implementation        MB/s')
+
+    expected = hashlib.sha256(message).digest()
+    implementations = [
+        ('reference', lambda data: SHA256(reference=True, data=data).digest()),
+        ('fast', lambda data: SHA256(data=data).digest()),
+        ('hashlib', lambda data: hashlib.sha256(data).digest()),
+    ]
+    for name, function in implementations:
+        result, duration = timed(function, message)
+        if result != expected:
+            print('Error: the', name, 'hash differs from hashlib')
+
+        print('{:<17} {:>9.3f}'.format(name, size_mb / duration))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+"""
+Timing helpers shared by the benchmarks
+"""
+import time
+
+
+def timed(function, *args):
+    """
+    Runs the function and measures its duration
+    :return: The result of the function and its duration in seconds
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def rate(function, arguments: list) -> float:
+    """
+    Calls the function with every tuple of arguments
+    :return: The number of calls per second
+    """
+    start = time.perf_counter()
+    for argument in arguments:
+        function(*argument)
+
+    return len(arguments) / (time.perf_counter() - start)
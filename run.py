@@ -1,3 +1,4 @@
 from app import __main__ as run
 
-run.main()
+if __name__ == '__main__':  # Required by the worker processes of the parallel cipher modes
+    run.main()
@@ -26,6 +26,9 @@ setup(
     licence=LICENCE,
     python_requires=REQUIRES_PYTHON,
     install_requires=INSTALL_REQUIRES,
+    extras_require={
+        'numpy': ['numpy'],  # Vectorized KASUMI (Kasumi.encrypt_blocks)
+    },
     packages=find_packages(exclude=('tests',)),
     entry_points={
         'console_scripts': [
@@ -0,0 +1,79 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from app.hashes.batch import create_manifest, read_manifest, verify_manifest
+from app.hashes.hash.sponge_hash import SpongeHash
+from app.hashes.hash_cache import HashCache
+
+
+class TestBatch(TestCase):
+    def test_manifest(self):
+        with tempfile.TemporaryDirectory() as root:
+            os.mkdir(os.path.join(root, 'sub'))
+            for file_path in ['a.txt', 'sub/b.txt', 'sub/c.bin']:
+                with open(os.path.join(root, file_path), 'wb') as file:
+                    file.write(os.urandom(100))
+
+            manifest_path = os.path.join(root, 'manifest.txt')
+            entries = create_manifest(root, manifest_path, workers=2)
+            self.assertEqual([entry[0] for entry in entries], ['a.txt', 'sub/b.txt', 'sub/c.bin'])
+            self.assertEqual(read_manifest(manifest_path), entries)
+            self.assertEqual(entries[0][3], SpongeHash().hash_file(os.path.join(root, 'a.txt')))
+
+            with open(os.path.join(root, 'sub/b.txt'), 'ab') as file:
+                file.write(b'a')
+            os.remove(os.path.join(root, 'sub/c.bin'))
+
+            self.assertEqual(verify_manifest(root, manifest_path, workers=2), (['a.txt'], ['sub/b.txt'], ['sub/c.bin']))
+
+    def test_hash_cache(self):
+        with tempfile.TemporaryDirectory() as root:
+            file_path = os.path.join(root, 'a.txt')
+            with open(file_path, 'wb') as file:
+                file.write(os.urandom(100))
+
+            with HashCache(os.path.join(root, 'cache.sqlite')) as cache:
+                file_hash = cache.hash_file(file_path)
+                self.assertEqual(cache.hash_file(file_path), file_hash)
+                self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+                with open(file_path, 'ab') as file:
+                    file.write(b'a')
+                self.assertEqual(cache.hash_file(file_path), SpongeHash().hash_file(file_path))
+                self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+            with HashCache(os.path.join(root, 'cache.sqlite')) as cache:  # Persisted
+                entries = create_manifest(root, os.path.join(root, 'manifest.txt'), workers=1, cache=cache)
+                self.assertEqual(entries[0][3], SpongeHash().hash_file(file_path))
+                self.assertEqual(cache.hits, 1)
+
+    def test_cache_in_root(self):
+        with tempfile.TemporaryDirectory() as root:
+            with open(os.path.join(root, 'a.txt'), 'wb') as file:
+                file.write(os.urandom(100))
+
+            manifest_path = os.path.join(root, 'manifest.txt')
+            with HashCache(os.path.join(root, 'hash_cache.sqlite')) as cache:
+                entries = create_manifest(root, manifest_path, workers=1, cache=cache)
+            self.assertEqual([entry[0] for entry in entries], ['a.txt'])
+
+            # Every run writes to the cache database
+            for _ in range(2):
+                with HashCache(os.path.join(root, 'hash_cache.sqlite')) as cache:
+                    self.assertEqual(verify_manifest(root, manifest_path, workers=1, cache=cache), (['a.txt'], [], []))
+
+    def test_excluded_directory(self):
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, 'primes/pool/512'))
+            for file_path in ['a.txt', 'primes/p.txt', 'primes/pool/512/prime.txt']:
+                with open(os.path.join(root, file_path), 'wb') as file:
+                    file.write(os.urandom(100))
+
+            manifest_path = os.path.join(root, 'manifest.txt')
+            entries = create_manifest(root, manifest_path, workers=1, excluded=[os.path.join(root, 'primes/pool/')])
+            self.assertEqual([entry[0] for entry in entries], ['a.txt', 'primes/p.txt'])
+
+            # A prime taken from the reserve
+            os.remove(os.path.join(root, 'primes/pool/512/prime.txt'))
+            self.assertEqual(verify_manifest(root, manifest_path, workers=1), (['a.txt', 'primes/p.txt'], [], []))
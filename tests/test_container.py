@@ -0,0 +1,45 @@
+import io
+import os
+import struct
+import tempfile
+from unittest import TestCase
+
+from app.kasumi.container import encrypt_to_container, decrypt_container, export_hex, pack_header, unpack_header, \
+    HEADER_SIZE, HEADER_FORMAT, MAGIC, VERSION
+from app.kasumi.kasumi import Kasumi
+from tests.test_kasumi import KEY, IV, CIPHER_MODES
+
+
+class TestContainer(TestCase):
+    def test_container(self):
+        kasumi = Kasumi()
+        message_bytes = os.urandom(8 * 10 + 2) + b'\x00\x00'
+
+        for cipher_mode in CIPHER_MODES:
+            with self.subTest(cipher_mode=cipher_mode.__name__), tempfile.TemporaryDirectory() as tmp_dir:
+                cipher = cipher_mode(kasumi)
+                container_path = os.path.join(tmp_dir, 'message.ksm')
+                with open(container_path, 'wb') as writer:
+                    encrypt_to_container(io.BytesIO(message_bytes), writer, cipher, KEY, IV, chunk_size=32)
+
+                with open(container_path, 'rb') as file:
+                    container = file.read()
+                self.assertEqual(unpack_header(container), (cipher_mode, IV, len(message_bytes)))
+                self.assertEqual(container[HEADER_SIZE:], cipher.encrypt_bytes(message_bytes, KEY, IV))
+
+                decrypted = io.BytesIO()
+                self.assertEqual(decrypt_container(container_path, decrypted, KEY, kasumi, chunk_size=24),
+                                 len(message_bytes))
+                self.assertEqual(decrypted.getvalue(), message_bytes)
+
+                exported = io.StringIO()
+                export_hex(container_path, exported)
+                self.assertEqual(exported.getvalue(), container[HEADER_SIZE:].hex())
+
+    def test_iv_length(self):
+        cipher = CIPHER_MODES[1](Kasumi())
+        self.assertEqual(unpack_header(pack_header(cipher, hex(2**64 - 1), 5))[1], hex(2**64 - 1))
+        with self.assertRaises(ValueError):
+            pack_header(cipher, hex(2**64), 5)
+        with self.assertRaises(Exception):
+            unpack_header(struct.pack(HEADER_FORMAT, MAGIC, VERSION, 2, (2**64).to_bytes(16, 'big'), 5))
@@ -1,4 +1,20 @@
-from unittest import TestCase
+import io
+import os
+from unittest import TestCase, mock, skipIf
+
+from app.kasumi import parallel
+from app.kasumi.cipher_mode.cbc import CBC
+from app.kasumi.cipher_mode.cfb import CFB
+from app.kasumi.cipher_mode.ctr import CTR
+from app.kasumi.cipher_mode.ecb import ECB
+from app.kasumi.cipher_mode.gcm import GCM
+from app.kasumi.cipher_mode.ofb import OFB
+from app.kasumi.cipher_mode.pcbc import PCBC
+from app.kasumi.kasumi import Kasumi, np
+
+KEY = '0x9900aabbccddeeff1122334455667788'
+IV = '0x90abcdef12345678'
+CIPHER_MODES = [ECB, CBC, PCBC, CFB, OFB, CTR, GCM]
 
 
 class TestKasumi(TestCase):
@@ -7,3 +23,140 @@ class TestKasumi(TestCase):
 
     def test_decrypt(self):
         self.fail()
+
+    def test_key_schedule_cache(self):
+        kasumi = Kasumi()
+        key = 0x9900aabbccddeeff1122334455667788
+        expanded_key = Kasumi.expand_key(key)
+        misses = Kasumi.key_cache_info().misses
+
+        encrypted = kasumi.encrypt(0x0123456789abcdef, key)
+        self.assertEqual(encrypted, Kasumi().encrypt(0x0123456789abcdef, expanded_key))
+        self.assertEqual(kasumi.decrypt(encrypted, expanded_key), 0x0123456789abcdef)
+        self.assertIs(Kasumi.expand_key(key), expanded_key)
+        self.assertEqual(Kasumi.key_cache_info().misses, misses)
+
+    def test_encrypt_blocks(self):
+        kasumi = Kasumi()
+        key = Kasumi.expand_key(0x9900aabbccddeeff1122334455667788)
+        blocks = [int.from_bytes(os.urandom(8), 'big') for _ in range(100)] + [2**64 - 1, 0]
+        encrypted = [kasumi.encrypt(block, key) for block in blocks]
+
+        self.assertEqual(kasumi.encrypt_blocks(blocks, key), encrypted)
+        self.assertEqual(kasumi.decrypt_blocks(encrypted, key), blocks)
+        with self.assertRaises(ValueError):
+            kasumi.encrypt_blocks(blocks + [2**64], key)
+        with self.assertRaises(ValueError):
+            kasumi.decrypt(2**64, key)
+
+    @skipIf(np is None, 'numpy is not installed')
+    def test_encrypt_blocks_array(self):
+        kasumi = Kasumi()
+        key = Kasumi.expand_key(0x9900aabbccddeeff1122334455667788)
+        blocks = [int.from_bytes(os.urandom(8), 'big') for _ in range(10)]
+        encrypted = kasumi.encrypt_blocks(np.array(blocks, dtype=np.uint64), key)
+
+        self.assertEqual(encrypted.tolist(), [kasumi.encrypt(block, key) for block in blocks])
+        self.assertEqual(kasumi.decrypt_blocks(encrypted, key).tolist(), blocks)
+
+    def test_cipher_modes(self):
+        kasumi = Kasumi()
+        message = 'Mais oui bien sûr ! ' * 5
+        message_bytes = os.urandom(203) + b'\x00'
+
+        for cipher_mode in CIPHER_MODES:
+            with self.subTest(cipher_mode=cipher_mode.__name__):
+                cipher = cipher_mode(kasumi)
+
+                encrypted = cipher.encrypt(message, KEY, IV)
+                self.assertEqual(cipher.decrypt(encrypted, KEY, IV), message)
+
+                encrypted_bytes = cipher.encrypt_bytes(message_bytes, KEY, IV)
+                self.assertEqual(encrypted_bytes, cipher.encrypt_bytes(memoryview(message_bytes), KEY, IV))
+                self.assertEqual(cipher.decrypt_bytes(encrypted_bytes, KEY, IV, len(message_bytes)), message_bytes)
+
+    def test_iv_length(self):
+        kasumi = Kasumi()
+        for cipher_mode in CIPHER_MODES[1:]:
+            with self.subTest(cipher_mode=cipher_mode.__name__):
+                with self.assertRaises(ValueError):
+                    cipher_mode(kasumi).encrypt('Mais oui bien sûr !', KEY, hex(2**64))
+
+    def test_counter_wrap_around(self):
+        kasumi = Kasumi()
+        message_bytes = os.urandom(8 * 100 + 3)
+
+        # The counters of the last blocks go past 2^64
+        for iv in [hex(2**64 - 2), hex(2**64 - 1)]:
+            for cipher_mode in [CTR, GCM]:
+                with self.subTest(cipher_mode=cipher_mode.__name__, iv=iv):
+                    encrypted_bytes = cipher_mode(kasumi).encrypt_bytes(message_bytes, KEY, iv)
+                    self.assertEqual(cipher_mode(kasumi).decrypt_bytes(encrypted_bytes, KEY, iv, len(message_bytes)),
+                                     message_bytes)
+                    parallel_cipher = cipher_mode(kasumi, workers=2, chunk_size=16)
+                    self.assertEqual(parallel_cipher.encrypt_bytes(message_bytes, KEY, iv), encrypted_bytes)
+
+    def test_parallel_cipher_modes(self):
+        kasumi = Kasumi()
+        message_bytes = os.urandom(8 * 100 + 3)
+
+        for cipher_mode in [ECB, CTR, CBC, CFB]:
+            with self.subTest(cipher_mode=cipher_mode.__name__):
+                encrypted_bytes = cipher_mode(kasumi).encrypt_bytes(message_bytes, KEY, IV)
+                parallel_cipher = cipher_mode(kasumi, workers=2, chunk_size=16)
+
+                self.assertEqual(parallel_cipher.encrypt_bytes(message_bytes, KEY, IV), encrypted_bytes)
+                self.assertEqual(parallel_cipher.decrypt_bytes(encrypted_bytes, KEY, IV, len(message_bytes)),
+                                 message_bytes)
+
+    def test_parallel_pool(self):
+        message_bytes = os.urandom(8 * 100)
+        cipher = CTR(Kasumi(), workers=2, chunk_size=16)
+        create_pool = parallel.create_pool
+        pools = []
+
+        def record_pool(key, workers):
+            pools.append(create_pool(key, workers))
+            return pools[-1]
+
+        with mock.patch.object(parallel, 'create_pool', side_effect=record_pool):
+            encrypted_bytes = cipher.encrypt_bytes(message_bytes, KEY, IV)
+            self.assertEqual(cipher.decrypt_bytes(encrypted_bytes, KEY, IV, len(message_bytes)), message_bytes)
+
+        # A stream of several chunks uses a single pool too
+        with mock.patch.object(parallel, 'create_pool', side_effect=record_pool):
+            encrypted = io.BytesIO()
+            cipher.encrypt_stream(io.BytesIO(message_bytes), encrypted, KEY, IV, chunk_size=8 * 40)
+            decrypted = io.BytesIO()
+            cipher.decrypt_stream(io.BytesIO(encrypted.getvalue()), decrypted, KEY, IV, chunk_size=8 * 40,
+                                  length=len(message_bytes))
+            self.assertEqual(decrypted.getvalue(), message_bytes)
+
+        # One pool per operation, shut down at its end
+        self.assertEqual(len(pools), 4)
+        self.assertTrue(all(pool._shutdown_thread for pool in pools))
+
+    def test_stream_cipher_modes(self):
+        kasumi = Kasumi()
+        message_bytes = os.urandom(8 * 20 + 5)
+
+        for cipher_mode in CIPHER_MODES:
+            with self.subTest(cipher_mode=cipher_mode.__name__):
+                cipher = cipher_mode(kasumi)
+                encrypted = io.BytesIO()
+                self.assertEqual(cipher.encrypt_stream(io.BytesIO(message_bytes), encrypted, KEY, IV, chunk_size=21),
+                                 len(message_bytes))
+                self.assertEqual(encrypted.getvalue(), cipher.encrypt_bytes(message_bytes, KEY, IV))
+
+                decrypted = io.BytesIO()
+                cipher.decrypt_stream(io.BytesIO(encrypted.getvalue()), decrypted, KEY, IV, chunk_size=24,
+                                      length=len(message_bytes))
+                self.assertEqual(decrypted.getvalue(), message_bytes)
+
+                # Without the length, all the zeros at the end are removed as with decrypt_bytes
+                padded_message = message_bytes + bytes(30)
+                encrypted_bytes = cipher.encrypt_bytes(padded_message, KEY, IV)
+                decrypted = io.BytesIO()
+                self.assertEqual(cipher.decrypt_stream(io.BytesIO(encrypted_bytes), decrypted, KEY, IV, chunk_size=16),
+                                 len(message_bytes.rstrip(b'\x00')))
+                self.assertEqual(decrypted.getvalue(), cipher.decrypt_bytes(encrypted_bytes, KEY, IV))
@@ -0,0 +1,35 @@
+import random
+from unittest import TestCase
+
+from app.utils.modular_arithmetic import FixedBaseExponentiation, fixed_base, multi_exponentiation, square_and_multiply
+
+
+class TestModularArithmetic(TestCase):
+    def test_fixed_base_exponentiation(self):
+        modulo = random.getrandbits(256) | 1
+        base = random.randrange(2, modulo)
+        exponentiation = FixedBaseExponentiation(base, modulo, window=5)
+
+        # Short exponents first, the tables are extended for the longer ones
+        for n_bits in [0, 1, 5, 6, 64, 256, 600]:
+            with self.subTest(n_bits=n_bits):
+                power = random.getrandbits(n_bits) if n_bits else 0
+                self.assertEqual(exponentiation.power(power), square_and_multiply(base, power, modulo))
+
+        self.assertEqual(FixedBaseExponentiation(5, 1).power(3), 0)
+        self.assertIs(fixed_base(base, modulo), fixed_base(base, modulo))
+
+    def test_multi_exponentiation(self):
+        for n_bits in [64, 1100]:
+            with self.subTest(n_bits=n_bits):
+                modulo = random.getrandbits(n_bits) | 1
+                bases = [random.randrange(2, modulo) for _ in range(3)]
+                powers = [random.getrandbits(n_bits), random.getrandbits(n_bits // 3), 0]
+                expected = 1
+                for base, power in zip(bases, powers):
+                    expected = expected * pow(base, power, modulo) % modulo
+
+                self.assertEqual(multi_exponentiation(bases, powers, modulo), expected)
+                self.assertEqual(multi_exponentiation(bases, powers, modulo, window=1), expected)
+
+        self.assertEqual(multi_exponentiation([3, 5], [0, 0], 7), 1)
@@ -0,0 +1,135 @@
+import os
+import tempfile
+import time
+from unittest import TestCase, mock
+
+from app.keys_generator import prime as prime_module
+from app.keys_generator.prime import Prime, get_prime, find_generator, _check_is_prime, _sieve_of_eratosthenes, \
+    _sieve_safe_prime_candidates, _small_primes
+from app.keys_generator.prime_pool import PrimePool
+from app.keys_generator.xorshift import XORShift
+
+
+def _dead_worker(*args):
+    os._exit(1)
+
+
+class TestPrime(TestCase):
+    def test_check_is_prime(self):
+        primes = set(_sieve_of_eratosthenes(10000))
+        self.assertEqual([n for n in range(10000) if _check_is_prime(n)], sorted(primes))
+
+        # Carmichael number and strong pseudoprimes to base 2
+        for composite in [561, 2047, 3215031751, 3825123056546413051]:
+            self.assertFalse(_check_is_prime(composite))
+
+    def test_sieve_safe_prime_candidates(self):
+        start = (1 << 63) | 3
+        candidates = _sieve_safe_prime_candidates(start, 1000, 1 << 62)
+
+        self.assertTrue(all(candidate % 4 == 3 for candidate in candidates))
+        for small_prime in _small_primes[:100]:
+            self.assertTrue(all(candidate % small_prime > 1 for candidate in candidates))
+
+        # No safe prime of the window is discarded
+        safe_primes = [start + 4 * k for k in range(1000)
+                       if _check_is_prime(start + 4 * k) and _check_is_prime((start + 4 * k) >> 1)]
+        self.assertTrue(set(safe_primes) <= set(candidates))
+
+    def test_get_prime(self):
+        for n_bits in [16, 128]:
+            with self.subTest(n_bits=n_bits):
+                prime = get_prime(n_bits)
+                self.assertEqual(prime.bit_length(), n_bits)
+                self.assertTrue(_check_is_prime(prime) and _check_is_prime((prime - 1) >> 1))
+
+    def test_parallel_get_prime(self):
+        prime = get_prime(128, workers=2)
+        self.assertEqual(prime.bit_length(), 128)
+        self.assertTrue(_check_is_prime(prime) and _check_is_prime((prime - 1) >> 1))
+
+        with self.assertRaises(TimeoutError):
+            get_prime(4096, workers=2, timeout=0.1)
+        with self.assertRaises(TimeoutError):
+            get_prime(4096, timeout=0.1)
+        for workers in [0, -1]:
+            with self.assertRaises(ValueError):
+                get_prime(128, workers=workers)
+
+        # The parent does not wait forever when the workers die without result
+        with mock.patch.object(prime_module, '_search_safe_prime_worker', _dead_worker):
+            with self.assertRaises(RuntimeError):
+                get_prime(128, workers=2)
+
+    def test_find_generator(self):
+        def order(element, prime):
+            return next(i for i in range(1, prime) if pow(element, i, prime) == 1)
+
+        for prime in [23, 47, 983]:
+            with self.subTest(prime=prime):
+                smallest = next(g for g in range(2, prime) if order(g, prime) == prime - 1)
+                self.assertEqual(find_generator(prime), smallest)
+                # Random candidates only
+                self.assertEqual(order(find_generator(prime, 1), prime), prime - 1)
+
+        prime = get_prime(128)
+        self.assertEqual(pow(find_generator(prime), (prime - 1) >> 1, prime), prime - 1)
+
+    def test_xorshift_seed(self):
+        self.assertEqual(XORShift(42).getrandbits(512), XORShift(42).getrandbits(512))
+        self.assertNotEqual(XORShift(42).getrandbits(512), XORShift(43).getrandbits(512))
+        self.assertNotEqual(XORShift(0).getrandbits(64), 0)
+
+
+class TestPrimePool(TestCase):
+    def test_pool(self):
+        with tempfile.TemporaryDirectory() as pool_dir:
+            pool = PrimePool(pool_dir, sizes=(64,), low_watermark=1, high_watermark=2)
+            self.assertIsNone(pool.pop(64))
+
+            pool.refill()
+            self.assertEqual(pool.metrics()['depth'], {64: 2})
+
+            prime, generator = pool.pop(64)
+            self.assertTrue(_check_is_prime(prime) and _check_is_prime((prime - 1) >> 1))
+            self.assertEqual(pow(generator, (prime - 1) >> 1, prime), prime - 1)
+
+            pool.start()  # Refills in background as the depth (1) is under the high watermark after a new pop
+            prime_file = Prime(os.path.join(pool_dir, 'prime.txt'), n_bits=64, pool=pool)
+            self.assertNotEqual(prime_file.get_prime(), prime)
+            for _ in range(100):
+                if pool.depth(64) >= 2:
+                    break
+                time.sleep(0.05)
+            pool.stop()
+
+            self.assertEqual(pool.metrics()['hits'], 2)
+            self.assertGreaterEqual(pool.depth(64), 2)
+
+            # The function giving the reserve is only called when the prime has to be generated
+            calls = []
+            Prime(os.path.join(pool_dir, 'prime.txt'), n_bits=64, pool=lambda: calls.append(1) or pool)
+            self.assertEqual(calls, [])
+            Prime(os.path.join(pool_dir, 'other_prime.txt'), n_bits=64, pool=lambda: calls.append(1) or pool)
+            self.assertEqual((calls, pool.metrics()['hits']), ([1], 3))
+
+    def test_pool_refill_after_pop(self):
+        with tempfile.TemporaryDirectory() as pool_dir:
+            # Only a pop can wake up the background thread before an hour
+            pool = PrimePool(pool_dir, sizes=(64,), low_watermark=2, high_watermark=3, refill_interval=3600)
+            pool.refill()
+            pool.start()
+            try:
+                self.assertIsNotNone(pool.pop(64))  # Depth 2, not under the low watermark
+                time.sleep(0.1)
+                self.assertEqual((pool.depth(64), pool.generated), (2, 3))
+
+                self.assertIsNotNone(pool.pop(64))  # Depth 1, the reserve is refilled
+                for _ in range(100):
+                    if pool.depth(64) >= 3:
+                        break
+                    time.sleep(0.05)
+            finally:
+                pool.stop()
+
+            self.assertEqual((pool.depth(64), pool.generated), (3, 5))
@@ -0,0 +1,101 @@
+import os
+import tempfile
+from unittest import TestCase, mock
+
+from app.blockchain.signature import rsa
+from app.blockchain.signature.rsa import RSASignature
+from app.keys_generator import cli
+from app.keys_generator.keys_manager import rsa_keys
+from app.keys_generator.keys_manager.rsa_keys import RSAKeysManager
+from app.keys_generator.prime import get_prime
+
+
+class TestRSA(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # The modulus must be longer than the 512-bit hashes
+        cls.primes = [get_prime(512), get_prime(512)]
+
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__paths = rsa_keys.path_public, rsa_keys.path_private
+        rsa_keys.path_public = os.path.join(self.__directory.name, 'public')
+        rsa_keys.path_private = os.path.join(self.__directory.name, 'private')
+        os.makedirs(rsa_keys.path_public)
+        os.makedirs(rsa_keys.path_private)
+
+    def tearDown(self):
+        rsa_keys.path_public, rsa_keys.path_private = self.__paths
+        self.__directory.cleanup()
+
+    def test_sign_crt(self):
+        p, q = self.primes
+        k_manager = RSAKeysManager('key.txt', [p, q])
+        message = 'Alice envoie 10 coins à Bob'
+        signature = RSASignature(k_manager).sign(message)
+
+        self.assertTrue(RSASignature.verify(message, signature, k_manager.get_public()))
+        self.assertFalse(RSASignature.verify(message + '0', signature, k_manager.get_public()))
+
+        # Keys loaded from the file, with and without the CRT parameters
+        self.assertEqual(RSASignature(RSAKeysManager('key.txt')).sign(message), signature)
+        private_path = os.path.join(rsa_keys.path_private, 'key.txt')
+        with open(private_path) as file:
+            lines = file.read().splitlines()
+        with open(private_path, 'w') as file:
+            file.write('\n'.join(lines[:2]))
+        legacy_manager = RSAKeysManager('key.txt')
+        self.assertIsNone(legacy_manager.get_crt_parameters())
+        self.assertEqual(RSASignature(legacy_manager).sign(message), signature)
+
+    def test_public_exponent(self):
+        p, q = self.primes
+        self.assertEqual(RSAKeysManager('key_65537.txt', [p, q]).get_public_key(), 65537)
+        self.assertEqual(RSAKeysManager('key_3.txt', [p, q], public_exponent=3).get_public_key(), 3)
+
+        k_manager = RSAKeysManager('key_random.txt', [p, q], public_exponent=None)
+        message = 'Bob envoie 5 coins à Alice'
+        self.assertTrue(RSASignature.verify(message, RSASignature(k_manager).sign(message), k_manager.get_public()))
+
+        # 3 divides 7 - 1
+        with self.assertRaises(ValueError):
+            RSAKeysManager('key_invalid.txt', [7, 13], public_exponent=3)
+
+    def test_prime_from_file(self):
+        # 65537 divides 917519 - 1, the prime of the file can not be used with the default public exponent
+        prime_path = os.path.join(self.__directory.name, 'prime_p.txt')
+        with open(prime_path, 'w') as file:
+            file.write('917519')
+        with self.assertRaises(ValueError):
+            RSAKeysManager('key_invalid.txt', [917519, self.primes[1]])
+
+        prime = cli.get_rsa_prime(prime_path, with_generator=False, pool=None)
+        self.assertNotEqual(prime, 917519)
+        self.assertTrue(rsa_keys.is_valid_rsa_prime(prime, rsa_keys.DEFAULT_PUBLIC_EXPONENT))
+        with open(prime_path) as file:
+            self.assertEqual(int(file.read()), prime)
+        self.assertEqual(cli.get_rsa_prime(prime_path, with_generator=False, pool=None), prime)
+
+    def test_verify_batch(self):
+        k_managers = [RSAKeysManager('key_a.txt', self.primes), RSAKeysManager('key_b.txt', self.primes, 3)]
+        items = []
+        for i in range(70):
+            k_manager = k_managers[i % 2]
+            message = 'Transaction ' + str(i)
+            items.append((message, RSASignature(k_manager).sign(message), k_manager.get_public()))
+        # Altered messages
+        for i in [5, 42]:
+            items[i] = (items[i][0] + '0',) + items[i][1:]
+
+        expected = [i not in [5, 42] for i in range(len(items))]
+        for workers in [1, 2]:
+            with self.subTest(workers=workers):
+                self.assertEqual(RSASignature.verify_batch(items, workers), expected)
+                self.assertEqual(RSASignature.verify_batch(items[:5], workers), [True] * 5)
+
+        self.assertEqual(RSASignature.verify_batch([]), [])
+
+        # Serial unless processes are asked for
+        with mock.patch.object(rsa, 'ProcessPoolExecutor') as executor:
+            self.assertEqual(RSASignature.verify_batch(items), expected)
+        executor.assert_not_called()
@@ -0,0 +1,30 @@
+import hashlib
+import os
+from unittest import TestCase
+
+from app.hashes.hash.sha256 import SHA256
+
+
+class TestSHA256(TestCase):
+    def test_hash(self):
+        for message in ['abc', 'Mais oui bien sûr ! ' * 10]:
+            with self.subTest(message=message):
+                self.assertEqual(SHA256().hash(message),
+                                 hashlib.sha256(message.encode('utf-8')).hexdigest().lstrip('0x'))
+                self.assertEqual(SHA256(reference=True).hash(message), SHA256().hash(message))
+
+    def test_update(self):
+        for length in [0, 55, 56, 64, 65, 200]:
+            with self.subTest(length=length):
+                message = os.urandom(length)
+                sha256 = SHA256()
+                for i in range(0, length, 7):  # Chunks not aligned on the blocks
+                    sha256.update(message[i:i + 7])
+
+                self.assertEqual(sha256.digest(), hashlib.sha256(message).digest())
+                self.assertEqual(SHA256(data=memoryview(message)).hexdigest(), hashlib.sha256(message).hexdigest())
+
+                sha256_copy = sha256.copy()
+                sha256_copy.update(b'a')
+                self.assertEqual(sha256_copy.digest(), hashlib.sha256(message + b'a').digest())
+                self.assertEqual(sha256.digest(), hashlib.sha256(message).digest())
@@ -0,0 +1,54 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from app.hashes.hash.sha256 import SHA256
+from app.hashes.hash.sponge_hash import SpongeHash
+
+
+def sponge_reference(message: bytes) -> int:
+    """ Sponge hash computed on integers, as described in the README """
+    message_length = len(message) * 8
+    nb_parts = (message_length + 1 + 64 + 255) // 256
+    padded = ((((int.from_bytes(message, 'big') << 1) | 1) << (nb_parts * 256 - message_length - 1 - 64)) << 64) | \
+        message_length
+    parts = [(padded >> (256 * (nb_parts - i - 1))) & ((1 << 256) - 1) for i in range(nb_parts)]
+
+    state = 0
+    for part in parts:
+        state = SHA256().hash(state ^ part, to_hex=False, pad_message=False)
+    if len(parts) < 2:
+        state = SHA256().hash(state, to_hex=False, pad_message=False)
+
+    return (SHA256().hash(state, to_hex=False, pad_message=False) << 256) | state
+
+
+class TestSpongeHash(TestCase):
+    def test_hash(self):
+        for length in [0, 1, 23, 24, 32, 100]:
+            with self.subTest(length=length):
+                message = os.urandom(length)
+                self.assertEqual(SpongeHash().hash(message, to_hex=False), sponge_reference(message))
+                self.assertEqual(SpongeHash().hash(memoryview(message)), hex(sponge_reference(message)).lstrip('0x'))
+
+        self.assertEqual(SpongeHash().hash('Mais oui bien sûr !'),
+                         SpongeHash().hash('Mais oui bien sûr !'.encode('utf-8')))
+
+    def test_update(self):
+        message = os.urandom(200)
+        sponge = SpongeHash()
+        for i in range(0, len(message), 13):  # Chunks not aligned on the message parts
+            sponge.update(message[i:i + 13])
+
+        self.assertEqual(sponge.hexdigest(), SpongeHash().hash(message))
+        self.assertEqual(int.from_bytes(sponge.digest(), 'big'), sponge_reference(message))
+
+    def test_hash_file(self):
+        message = os.urandom(1000)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, 'message.bin')
+            with open(file_path, 'wb') as file:
+                file.write(message)
+
+            self.assertEqual(SpongeHash().hash_file(file_path, chunk_size=100), SpongeHash().hash(message))
+            self.assertEqual(SpongeHash().hash_file(file_path, use_mmap=True), SpongeHash().hash(message))